@@ -1,40 +1,295 @@
+import math
 import numpy as np
-import heapq
 import random
-import time
-import matplotlib.pyplot as plt
+from pricelevel import BookSide, PriceLevel
+from stopindex import StopIndex
+from bookwatchers import TopOfBookWatcher, DepthWatcher
 from orderbook import Order
+from orderstore import OrderStore, BUY, SELL, NIL, SIDE_CODES, ORDER_TYPE_CODES
+from eventjournal import ADD, CANCEL, MODIFY, TRADE
+from simclock import RealTimeClock
 
 class AdvancedOrderBook:
-    def __init__(self, levels=5):
+    def __init__(self, levels=5, clock=None, rng=None, journal=None, order_flow=None):
         self.levels = levels
-        self.buy_orders = []  # Max-heap for buy orders
-        self.sell_orders = []  # Min-heap for sell orders
+        self.clock = clock if clock is not None else RealTimeClock()  # Stamps new orders
+        self.rng = rng if rng is not None else random  # Seeded random.Random for reproducible runs
+        self.store = OrderStore()  # Columnar storage for every resting order
+        self.buy_side = BookSide('buy', self.store)  # Bid price levels, best (highest) first
+        self.sell_side = BookSide('sell', self.store)  # Ask price levels, best (lowest) first
         self.order_id = 0  # Unique ID for orders
-        self.order_map = {}  # Order ID to order mapping for easy removal
+        self.order_map = {}  # Order ID to OrderStore slot for O(1) cancels
+        self.buy_stops = StopIndex('buy')  # Pending stop and stop-limit orders, by trigger price
+        self.sell_stops = StopIndex('sell')
+        self.stop_sequence = 0  # Time priority among stops with the same trigger price
+        self.last_trade_price = None  # Drives the stop triggers
+        self.triggering = False  # Set while triggered stops are matching, so they don't recurse
+        self.journal = journal  # Optional EventJournal for adds, cancels and modifies
+        self.listeners = []  # Objects with on_book_update(book) and on_trade(price, quantity, side, timestamp)
+        self.order_flow = order_flow  # Optional OrderFlowGenerator that replaces the random updates
+        self._allocate_fill_buffers(1024)
 
-    def add_order(self, side, price, quantity, order_type='limit'):
-        """Adds a new order to the order book."""
-        order = Order(self.order_id, side, price, quantity, order_type)
-        if side == 'buy':
-            heapq.heappush(self.buy_orders, order)
-        else:
-            heapq.heappush(self.sell_orders, order)
-        self.order_map[self.order_id] = order
-        self.order_id += 1
-        return order.order_id
+    def add_listener(self, listener):
+        """Subscribes a listener (e.g. a SignalEngine) to book updates and trades."""
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def subscribe_top_of_book(self, callback, sizes=False):
+        """Calls callback(best_bid, bid_size, best_ask, ask_size) now and whenever the best prices change.
+
+        With sizes=True, size changes at the best prices count too. Returns the listener, for remove_listener.
+        """
+        watcher = TopOfBookWatcher(callback, sizes)
+        self.add_listener(watcher)
+        watcher.on_book_update(self)
+        return watcher
+
+    def subscribe_depth(self, n, callback):
+        """Calls callback(bid_prices, bid_sizes, ask_prices, ask_sizes) now and whenever the top n levels change."""
+        watcher = DepthWatcher(n, callback)
+        self.add_listener(watcher)
+        watcher.on_book_update(self)
+        return watcher
+
+    def _notify_book_update(self):
+        for listener in self.listeners:
+            listener.on_book_update(self)
+
+    def _notify_trades(self, side, prices, quantities):
+        timestamp = self.clock.time()
+        for price, quantity in zip(prices, quantities):
+            for listener in self.listeners:
+                listener.on_trade(price, quantity, side, timestamp)
+
+    def _allocate_fill_buffers(self, capacity):
+        """(Re)allocates the reusable output arrays for match_orders_batch, keeping existing fills."""
+        old = getattr(self, 'fill_taker', None)
+        buffers = (np.empty(capacity, dtype=np.int64), np.empty(capacity, dtype=np.int64),
+                   np.empty(capacity, dtype=np.float64), np.empty(capacity, dtype=np.int64))
+        if old is not None:
+            for new, current in zip(buffers, (self.fill_taker, self.fill_maker_id, self.fill_price, self.fill_quantity)):
+                new[:len(current)] = current
+        self.fill_taker, self.fill_maker_id, self.fill_price, self.fill_quantity = buffers
+
+    def _book_side(self, side):
+        return self.buy_side if side == 'buy' else self.sell_side
+
+    def _rest_order(self, order_id, side, price, quantity, order_type):
+        """Stores an order, queues it at the back of its price level and indexes it."""
+        slot = self.store.allocate(order_id, SIDE_CODES[side], price, quantity, ORDER_TYPE_CODES[order_type], self.clock.time())
+        book_side = self._book_side(side)
+        book_side.get_level(price).append(slot)
+        book_side.touch(price)
+        self.order_map[order_id] = slot
+
+    def _remove_order(self, order_id, slot):
+        """Unlinks a resting order, frees its slot and drops its price level once empty."""
+        book_side = self.buy_side if self.store.side[slot] == BUY else self.sell_side
+        level = book_side.levels[float(self.store.price[slot])]
+        level.remove(slot)
+        del self.order_map[order_id]
+        self.store.release(slot)
+        if not level:
+            book_side.remove_level(level)
+        book_side.touch(level.price)
+
+    def add_order(self, side, price, quantity, order_type='limit', order_id=None):
+        """Adds a new order to the order book. Replayed market data can pass its own order ID."""
+        if order_id is None:
+            order_id = self.order_id
+        self._rest_order(order_id, side, price, quantity, order_type)
+        self.order_id = max(self.order_id, order_id + 1)
+        if self.journal is not None:
+            self.journal.record(self.clock.time(), ADD, SIDE_CODES[side], order_id, price, quantity)
+        if self.listeners:
+            self._notify_book_update()
+        return order_id
+
+    def add_orders(self, sides, prices, quantities, order_type='limit'):
+        """Rests a batch of orders (BUY/SELL codes) in sequence and returns their order IDs.
+
+        Same result as add_order for each, but the slots are allocated and filled in bulk, and
+        listeners hear about the batch once.
+        """
+        sides = np.asarray(sides, dtype=np.int8)
+        order_ids = np.arange(self.order_id, self.order_id + len(sides), dtype=np.int64)
+        if not len(sides):
+            return order_ids
+        self.order_id += len(sides)
+        slots = self.store.allocate_batch(order_ids, sides, prices, quantities, ORDER_TYPE_CODES[order_type], self.clock.time())
+        self.order_map.update(zip(order_ids.tolist(), slots.tolist()))
+        book_sides = (self.buy_side, self.sell_side)
+        for slot, side, price in zip(slots.tolist(), sides.tolist(), np.asarray(prices, dtype=np.float64).tolist()):
+            book_side = book_sides[side]
+            book_side.get_level(price).append(slot)
+            book_side.touch(price)
+        if self.journal is not None:
+            timestamp = self.clock.time()
+            for order_id, side, price, quantity in zip(order_ids.tolist(), sides.tolist(), np.asarray(prices).tolist(),
+                                                       np.asarray(quantities).tolist()):
+                self.journal.record(timestamp, ADD, side, order_id, price, quantity)
+        if self.listeners:
+            self._notify_book_update()
+        return order_ids
+
+    def add_stop_order(self, side, stop_price, quantity, limit_price=None, order_id=None):
+        """Queues a stop order that enters the book once a trade reaches stop_price.
+
+        Buy stops trigger on trades at or above stop_price and sell stops at or below. A stop becomes
+        a market order when triggered; with limit_price it becomes a limit order, and any unfilled
+        remainder rests at that price. A stop the last trade has already reached triggers at once.
+        """
+        if order_id is None:
+            order_id = self.order_id
+        self.order_id = max(self.order_id, order_id + 1)
+        stops = self.buy_stops if side == 'buy' else self.sell_stops
+        stops.add(order_id, stop_price, quantity, limit_price, self.stop_sequence)
+        self.stop_sequence += 1
+        if self.last_trade_price is not None and not self.triggering:
+            self._trigger_stops()  # Every other stop was checked at the last trade, so only this one can fire
+        return order_id
+
+    def _trigger_stops(self):
+        """Sends the stops crossed by the last trade through match_order, nearest trigger first.
+
+        Trades by triggered orders can trigger further stops, which are handled in the next round
+        rather than recursively, so the cascade fires in trigger order.
+        """
+        self.triggering = True
+        try:
+            while True:
+                price = self.last_trade_price
+                fired = [('buy',) + stop for stop in self.buy_stops.triggered(price)]
+                fired += [('sell',) + stop for stop in self.sell_stops.triggered(price)]
+                if not fired:
+                    break
+                for side, order_id, stop_price, limit_price, quantity in fired:
+                    if limit_price is None:
+                        # Stop orders trade at any price once triggered
+                        order = Order(order_id, side, math.inf if side == 'buy' else -math.inf, quantity, 'market', self.clock.time())
+                    else:
+                        order = Order(order_id, side, limit_price, quantity, 'limit', self.clock.time())
+                    self.match_order(order)
+                    if order.quantity > 0 and limit_price is not None:
+                        self.add_order(side, limit_price, order.quantity, order_id=order_id)
+        finally:
+            self.triggering = False
 
     def cancel_order(self, order_id):
-        """Cancels an order by removing it from the heap and the order map."""
+        """Cancels an order by unlinking it from its price level, or drops a pending stop."""
         if order_id in self.order_map:
-            order = self.order_map[order_id]
-            if order.side == 'buy':
-                self.buy_orders = [o for o in self.buy_orders if o.order_id != order_id]
-                heapq.heapify(self.buy_orders)  # Rebuild the heap after removal
-            else:
-                self.sell_orders = [o for o in self.sell_orders if o.order_id != order_id]
-                heapq.heapify(self.sell_orders)
-            del self.order_map[order_id]
+            slot = self.order_map[order_id]
+            if self.journal is not None:
+                self.journal.record(self.clock.time(), CANCEL, self.store.side[slot], order_id, self.store.price[slot], self.store.quantity[slot])
+            self._remove_order(order_id, slot)
+            if self.listeners:
+                self._notify_book_update()
+        elif not self.buy_stops.remove(order_id):
+            self.sell_stops.remove(order_id)
+
+    def cancel_orders(self, order_ids):
+        """Cancels a batch of orders (or pending stops); IDs no longer in the book are skipped.
+
+        Same result as cancel_order for each, but the slots are released in bulk and listeners
+        hear about the batch once.
+        """
+        store = self.store
+        slots = []
+        for order_id in order_ids:
+            slot = self.order_map.pop(order_id, NIL)
+            if slot != NIL:
+                slots.append(slot)
+            elif not self.buy_stops.remove(order_id):
+                self.sell_stops.remove(order_id)
+        if not slots:
+            return
+        slots = np.array(slots, dtype=np.int64)
+        sides, prices = store.side[slots].tolist(), store.price[slots].tolist()  # Read once, before the slots are released
+        if self.journal is not None:
+            timestamp = self.clock.time()
+            for order_id, side, price, quantity in zip(store.order_id[slots].tolist(), sides, prices, store.quantity[slots].tolist()):
+                self.journal.record(timestamp, CANCEL, side, order_id, price, quantity)
+        book_sides = (self.buy_side, self.sell_side)
+        for slot, side, price in zip(slots.tolist(), sides, prices):
+            book_side = book_sides[side]
+            level = book_side.levels[price]
+            level.remove(slot)
+            if not level:
+                book_side.remove_level(level)
+            book_side.touch(price)
+        store.release_batch(slots)
+        if self.listeners:
+            self._notify_book_update()
+
+    def get_orders(self, order_ids):
+        """Returns (prices, quantities) arrays for a batch of order IDs; NaN and 0 for orders no longer resting."""
+        slots = np.array([self.order_map.get(order_id, NIL) for order_id in order_ids], dtype=np.int64)
+        resting = slots != NIL
+        prices = np.where(resting, self.store.price[np.where(resting, slots, 0)], np.nan)
+        quantities = np.where(resting, self.store.quantity[np.where(resting, slots, 0)], 0)
+        return prices, quantities
+
+    def get_order(self, order_id):
+        """Returns a read-only view of a resting order, or None if it is no longer in the book."""
+        slot = self.order_map.get(order_id)
+        return None if slot is None else self.store.view(slot)
+
+    def modify_order(self, order_id, price=None, quantity=None):
+        """Amends a resting order. Size reductions keep queue priority; price changes and size increases lose it."""
+        if order_id not in self.order_map:
+            return
+        order = self.get_order(order_id)
+        new_price = order.price if price is None else price
+        new_quantity = order.quantity if quantity is None else quantity
+        if self.journal is not None:
+            self.journal.record(self.clock.time(), MODIFY, SIDE_CODES[order.side], order_id, new_price, new_quantity)
+        if new_quantity <= 0:
+            self._remove_order(order_id, order.slot)
+        elif new_price == order.price and new_quantity <= order.quantity:
+            book_side = self._book_side(order.side)
+            level = book_side.levels[order.price]
+            level.quantity -= order.quantity - new_quantity
+            self.store.quantity[order.slot] = new_quantity
+            book_side.touch(order.price)
+        else:
+            side, order_type = order.side, order.order_type
+            self._remove_order(order_id, order.slot)
+            self._rest_order(order_id, side, new_price, new_quantity, order_type)
+        if self.listeners:
+            self._notify_book_update()
+
+    def execute_order(self, order_id, quantity=0):
+        """Trades a resting order against an aggressor from outside the book, e.g. a replayed execution.
+
+        The order shrinks in place (keeping its queue position), or is removed if quantity is 0 or
+        covers it. Like a match, the trade sets last_trade_price, reaches listeners and fires stops.
+        Returns the traded quantity.
+        """
+        slot = self.order_map.get(order_id)
+        if slot is None:
+            return 0
+        store = self.store
+        side, price, resting_quantity = int(store.side[slot]), float(store.price[slot]), int(store.quantity[slot])
+        if not 0 < quantity < resting_quantity:
+            quantity = resting_quantity
+        if self.journal is not None:
+            self.journal.record(self.clock.time(), TRADE, side, order_id, price, quantity)
+        if quantity < resting_quantity:
+            book_side = self.buy_side if side == BUY else self.sell_side
+            book_side.levels[price].quantity -= quantity
+            store.quantity[slot] = resting_quantity - quantity
+            book_side.touch(price)
+        else:
+            self._remove_order(order_id, slot)
+        self.last_trade_price = price
+        if self.listeners:
+            self._notify_trades(SELL if side == BUY else BUY, (price,), (quantity,))  # The aggressor took the other side
+            self._notify_book_update()
+        if (self.buy_stops.entries or self.sell_stops.entries) and not self.triggering:
+            self._trigger_stops()
+        return quantity
 
     def match_order(self, incoming_order):
         """Matches an incoming order against the order book."""
@@ -45,56 +300,188 @@ class AdvancedOrderBook:
 
     def match_buy_order(self, buy_order):
         """Matches a buy order against the sell side of the book."""
-        trades = []
-        while buy_order.quantity > 0 and len(self.sell_orders) > 0 and buy_order.price >= self.sell_orders[0].price:
-            best_sell_order = heapq.heappop(self.sell_orders)
-            trade_quantity = min(buy_order.quantity, best_sell_order.quantity)
-            trades.append((best_sell_order.price, trade_quantity))
-            buy_order.quantity -= trade_quantity
-            best_sell_order.quantity -= trade_quantity
-            if best_sell_order.quantity > 0:
-                heapq.heappush(self.sell_orders, best_sell_order)
-        return trades
+        return self._match(buy_order, self.sell_side)
 
     def match_sell_order(self, sell_order):
         """Matches a sell order against the buy side of the book."""
+        return self._match(sell_order, self.buy_side)
+
+    def _match(self, incoming_order, book_side):
+        """Fills an incoming order against the best levels of the opposite side, oldest order first."""
         trades = []
-        while sell_order.quantity > 0 and len(self.buy_orders) > 0 and sell_order.price <= self.buy_orders[0].price:
-            best_buy_order = heapq.heappop(self.buy_orders)
-            trade_quantity = min(sell_order.quantity, best_buy_order.quantity)
-            trades.append((best_buy_order.price, trade_quantity))
-            sell_order.quantity -= trade_quantity
-            best_buy_order.quantity -= trade_quantity
-            if best_buy_order.quantity > 0:
-                heapq.heappush(self.buy_orders, best_buy_order)
+        quantities = self.store.quantity
+        journal = self.journal
+        while incoming_order.quantity > 0 and book_side.crosses(incoming_order.price):
+            level = book_side.best_level()
+            slot = level.head
+            resting_quantity = int(quantities[slot])
+            trade_quantity = min(incoming_order.quantity, resting_quantity)
+            trades.append((level.price, trade_quantity))
+            if journal is not None:
+                journal.record(self.clock.time(), TRADE, self.store.side[slot], self.store.order_id[slot], level.price, trade_quantity)
+            incoming_order.quantity -= trade_quantity
+            if trade_quantity < resting_quantity:
+                quantities[slot] = resting_quantity - trade_quantity
+                level.quantity -= trade_quantity
+                book_side.touch(level.price)
+            else:
+                self._remove_order(int(self.store.order_id[slot]), slot)
+        if trades:
+            self.last_trade_price = trades[-1][0]
+            if self.listeners:
+                self._notify_trades(SIDE_CODES[incoming_order.side], *zip(*trades))
+                self._notify_book_update()
+            if (self.buy_stops.entries or self.sell_stops.entries) and not self.triggering:
+                self._trigger_stops()
         return trades
 
+    def match_orders_batch(self, sides, prices, quantities):
+        """Matches a batch of incoming orders in sequence against the book.
+
+        sides holds BUY/SELL codes. Returns (taker index, maker order ID, price, quantity) arrays with
+        one entry per fill. They are views into buffers the book reuses, valid until the next call.
+        """
+        store = self.store
+        resting_quantities = store.quantity
+        journal = self.journal
+        count = 0
+        for taker, (side, price, quantity) in enumerate(zip(np.asarray(sides).tolist(), np.asarray(prices).tolist(), np.asarray(quantities).tolist())):
+            book_side = self.sell_side if side == BUY else self.buy_side
+            first_fill = count
+            while quantity > 0 and book_side.crosses(price):
+                level = book_side.best_level()
+                slot = level.head
+                resting_quantity = int(resting_quantities[slot])
+                trade_quantity = min(quantity, resting_quantity)
+                maker_id = int(store.order_id[slot])
+                if count == len(self.fill_taker):
+                    self._allocate_fill_buffers(2 * count)
+                self.fill_taker[count] = taker
+                self.fill_maker_id[count] = maker_id
+                self.fill_price[count] = level.price
+                self.fill_quantity[count] = trade_quantity
+                count += 1
+                if journal is not None:
+                    journal.record(self.clock.time(), TRADE, store.side[slot], maker_id, level.price, trade_quantity)
+                quantity -= trade_quantity
+                if trade_quantity < resting_quantity:
+                    resting_quantities[slot] = resting_quantity - trade_quantity
+                    level.quantity -= trade_quantity
+                    book_side.touch(level.price)
+                else:
+                    self._remove_order(maker_id, slot)
+            if count > first_fill:
+                self.last_trade_price = float(self.fill_price[count - 1])
+                if (self.buy_stops.entries or self.sell_stops.entries) and not self.triggering:
+                    self._trigger_stops()  # Before the next taker, so stops fire in sequence
+                    resting_quantities = store.quantity  # Resting a stop-limit can grow the store
+        if count and self.listeners:
+            taker_sides = np.asarray(sides)[self.fill_taker[:count]].tolist()
+            for side, price, quantity in zip(taker_sides, self.fill_price[:count].tolist(), self.fill_quantity[:count].tolist()):
+                self._notify_trades(side, (price,), (quantity,))
+            self._notify_book_update()
+        return self.fill_taker[:count], self.fill_maker_id[:count], self.fill_price[:count], self.fill_quantity[:count]
+
     def get_top_of_book(self):
         """Returns the top of the order book (best bid and ask)."""
-        best_bid = self.buy_orders[0].price if len(self.buy_orders) > 0 else None
-        best_ask = self.sell_orders[0].price if len(self.sell_orders) > 0 else None
-        return best_bid, best_ask
+        return self.buy_side.best_price(), self.sell_side.best_price()
+
+    def get_depth(self, n=None):
+        """Returns (bid prices, bid quantities, ask prices, ask quantities) for the top n levels, best first.
+
+        n defaults to the book's levels. The arrays are cached per side and only rebuilt after an
+        add, cancel or fill touches one of the cached levels, so reading depth every tick is cheap.
+        """
+        n = self.levels if n is None else n
+        bid_prices, bid_quantities = self.buy_side.depth(n)
+        ask_prices, ask_quantities = self.sell_side.depth(n)
+        return bid_prices, bid_quantities, ask_prices, ask_quantities
+
+    def snapshot(self):
+        """Resting orders, price levels and ID counters as a dict of NumPy arrays; see booksnapshot."""
+        store = self.store
+        state = {name: getattr(store, name)[:store.size].copy() for name in store.COLUMNS}  # Slots keep their links
+        levels = [(side_code, level) for side_code, book_side in ((BUY, self.buy_side), (SELL, self.sell_side))
+                  for level in book_side.levels.values()]
+        state['level_side'] = np.array([side_code for side_code, _ in levels], dtype=np.int8)
+        state['level_price'] = np.array([level.price for _, level in levels], dtype=np.float64)
+        state['level_head'] = np.array([level.head for _, level in levels], dtype=np.int64)
+        state['level_tail'] = np.array([level.tail for _, level in levels], dtype=np.int64)
+        state['level_count'] = np.array([level.count for _, level in levels], dtype=np.int64)
+        state['level_quantity'] = np.array([level.quantity for _, level in levels], dtype=np.int64)
+        state['map_order_id'] = np.fromiter(self.order_map.keys(), dtype=np.int64, count=len(self.order_map))
+        state['map_slot'] = np.fromiter(self.order_map.values(), dtype=np.int64, count=len(self.order_map))
+        stops = [(side_code, order_id) + stop for side_code, stop_index in ((BUY, self.buy_stops), (SELL, self.sell_stops))
+                 for order_id, stop in stop_index.stops.items()]
+        state['stop_side'] = np.array([stop[0] for stop in stops], dtype=np.int8)
+        state['stop_order_id'] = np.array([stop[1] for stop in stops], dtype=np.int64)
+        state['stop_price'] = np.array([stop[2] for stop in stops], dtype=np.float64)
+        state['stop_limit'] = np.array([math.nan if stop[3] is None else stop[3] for stop in stops], dtype=np.float64)
+        state['stop_quantity'] = np.array([stop[4] for stop in stops], dtype=np.int64)
+        state['stop_sequence'] = np.array([stop[5] for stop in stops], dtype=np.int64)
+        state['last_trade_price'] = np.float64(math.nan if self.last_trade_price is None else self.last_trade_price)
+        state['counters'] = np.array([store.size, store.count, store.free_head, store.sequence_counter, self.order_id,
+                                      self.stop_sequence], dtype=np.int64)
+        return state
+
+    def restore(self, state):
+        """Replaces the book's contents with a snapshot(), without replaying any orders."""
+        size, count, free_head, sequence_counter, order_id, stop_sequence = state['counters'].tolist()
+        store = OrderStore(max(size, 1024))
+        for name in store.COLUMNS:
+            getattr(store, name)[:size] = state[name]
+        store.size, store.count, store.free_head, store.sequence_counter = size, count, free_head, sequence_counter
+        self.store = store
+        self.buy_side = BookSide('buy', store)
+        self.sell_side = BookSide('sell', store)
+        for side_code, price, head, tail, level_count, quantity in zip(
+                state['level_side'].tolist(), state['level_price'].tolist(), state['level_head'].tolist(),
+                state['level_tail'].tolist(), state['level_count'].tolist(), state['level_quantity'].tolist()):
+            level = PriceLevel(price, store)
+            level.head, level.tail, level.count, level.quantity = head, tail, level_count, quantity
+            (self.buy_side if side_code == BUY else self.sell_side).levels[price] = level
+        for book_side in (self.buy_side, self.sell_side):
+            book_side.keys = sorted(book_side.sign * price for price in book_side.levels)
+        self.order_map = dict(zip(state['map_order_id'].tolist(), state['map_slot'].tolist()))
+        self.order_id = order_id
+        self.buy_stops = StopIndex('buy')
+        self.sell_stops = StopIndex('sell')
+        for side_code, stop_order_id, stop_price, limit_price, quantity, sequence in zip(
+                state['stop_side'].tolist(), state['stop_order_id'].tolist(), state['stop_price'].tolist(),
+                state['stop_limit'].tolist(), state['stop_quantity'].tolist(), state['stop_sequence'].tolist()):
+            stops = self.buy_stops if side_code == BUY else self.sell_stops
+            stops.add(stop_order_id, stop_price, quantity, None if math.isnan(limit_price) else limit_price, sequence)
+        self.stop_sequence = stop_sequence
+        last_trade_price = float(state['last_trade_price'])
+        self.last_trade_price = None if math.isnan(last_trade_price) else last_trade_price
+        if self.listeners:
+            self._notify_book_update()
 
     def update_order_book(self):
         """Simulate random new orders and cancellations over time."""
+        if self.order_flow is not None:
+            self.order_flow.stream_into(self, self.clock.time())  # Catch up with the synthetic flow
+            return
         # Randomly add new orders to the book
-        if random.random() < 0.5:
-            side = 'buy' if random.random() < 0.5 else 'sell'
-            price = random.uniform(90, 110)
-            quantity = random.randint(1, 100)
+        if self.rng.random() < 0.5:
+            side = 'buy' if self.rng.random() < 0.5 else 'sell'
+            price = self.rng.uniform(90, 110)
+            quantity = self.rng.randint(1, 100)
             self.add_order(side, price, quantity)
-        # Randomly cancel orders from the book
-        if random.random() < 0.2:
-            if random.random() < 0.5 and len(self.buy_orders) > 0:
-                self.cancel_order(self.buy_orders[0].order_id)
-            elif len(self.sell_orders) > 0:
-                self.cancel_order(self.sell_orders[0].order_id)
+        # Randomly cancel the oldest order at the best price
+        if self.rng.random() < 0.2:
+            if self.rng.random() < 0.5 and len(self.buy_side) > 0:
+                self.cancel_order(int(self.store.order_id[self.buy_side.best_level().head]))
+            elif len(self.sell_side) > 0:
+                self.cancel_order(int(self.store.order_id[self.sell_side.best_level().head]))
 
     def print_order_book(self):
         """Prints the current state of the order book."""
         print("Buy Orders:")
-        for order in self.buy_orders:
-            print(f"Price: {order.price}, Quantity: {order.quantity}")
+        for level in self.buy_side:
+            for slot in level:
+                print(f"Price: {level.price}, Quantity: {self.store.quantity[slot]}")
         print("Sell Orders:")
-        for order in self.sell_orders:
-            print(f"Price: {order.price}, Quantity: {order.quantity}")
\ No newline at end of file
+        for level in self.sell_side:
+            for slot in level:
+                print(f"Price: {level.price}, Quantity: {self.store.quantity[slot]}")
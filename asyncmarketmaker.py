@@ -0,0 +1,59 @@
+import asyncio
+import time
+from advancedorderbook import AdvancedOrderBook
+from marketmakerbotadvanced import MarketMakerBotAdvanced
+
+### Async Market-Maker Bot ###
+class AsyncMarketMakerBot(MarketMakerBotAdvanced):
+    """MarketMakerBotAdvanced whose orders are coroutines, so it keeps requoting while earlier orders are in flight.
+
+    Each order travels to the book for `latency` seconds, is matched, and its fills reach the bot
+    `ack_latency` seconds later. Run it with market_make_async; many bots can share one event loop.
+    """
+    def __init__(self, *args, ack_latency=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ack_latency = self.latency if ack_latency is None else ack_latency  # Time for fill reports to come back
+        self.in_flight = set()  # Tasks for orders that haven't been acknowledged yet
+        self.max_in_flight = 0
+
+    async def send_order(self, side, price, quantity):
+        """Submits one order and books its fills once they are acknowledged; returns the filled quantity."""
+        order_id = self.order_id
+        self.order_id += 1
+        await asyncio.sleep(self.latency)
+        trade_prices, trade_qtys = self.match_at_book(side, price, quantity)
+        trade_prices, trade_qtys = trade_prices.copy(), trade_qtys.copy()  # The book reuses its fill buffers
+        await asyncio.sleep(self.ack_latency)
+        self.book_fills(side, order_id, trade_prices, trade_qtys)
+        return int(trade_qtys.sum())
+
+    def _send_order(self, scheduler, side, price, quantity):
+        task = asyncio.get_running_loop().create_task(self.send_order(side, price, quantity))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+        self.max_in_flight = max(self.max_in_flight, len(self.in_flight))
+
+    async def market_make_async(self, duration=60, interval=0.1, performance_tracker=None):
+        """Async market-making loop: quotes every interval without waiting for earlier orders."""
+        for _ in range(int(duration / interval)):
+            self.tick(performance_tracker)
+            await asyncio.sleep(interval)
+        if self.in_flight:
+            await asyncio.gather(*self.in_flight)
+
+
+async def run_bots(bots, duration=60, interval=0.1, performance_trackers=None):
+    """Runs many async bots concurrently on the current event loop."""
+    trackers = performance_trackers or [None] * len(bots)
+    await asyncio.gather(*(bot.market_make_async(duration, interval, tracker) for bot, tracker in zip(bots, trackers)))
+
+
+if __name__ == '__main__':
+    bots = []
+    for _ in range(200):
+        bot = AsyncMarketMakerBot(latency=0.25)
+        bot.set_order_book(AdvancedOrderBook())
+        bots.append(bot)
+    start = time.time()
+    asyncio.run(run_bots(bots, duration=5))
+    print(f"{len(bots)} bots in {time.time() - start:.2f}s, up to {max(bot.max_in_flight for bot in bots)} orders in flight per bot")
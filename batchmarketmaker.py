@@ -0,0 +1,159 @@
+import numpy as np
+import random
+
+MAX_ORDER_SIZE = 20  # Largest order MarketMakerBotAdvanced.tick sends, so no fill reaches past this many resting orders
+
+### Shared Order Flow ###
+class OrderFlow:
+    """Top-of-book depth and bot order sizes recorded once per tick, shared by every bot in a batch."""
+    def __init__(self, bid_prices, bid_quantities, ask_prices, ask_quantities, buy_sizes, sell_sizes, bid_queue=None, ask_queue=None):
+        self.bid_prices = bid_prices  # (ticks, levels), NaN where a level is missing
+        self.bid_quantities = bid_quantities
+        self.ask_prices = ask_prices
+        self.ask_quantities = ask_quantities
+        self.buy_sizes = buy_sizes  # (ticks,), 0 when no buy order is sent that tick
+        self.sell_sizes = sell_sizes
+        # Optional (prices, quantities) of the first resting orders per side, (ticks, MAX_ORDER_SIZE) each in
+        # time priority; without them fills are walked per level, as if every level held a single order
+        self.bid_queue = bid_queue
+        self.ask_queue = ask_queue
+
+    def __len__(self):
+        return len(self.buy_sizes)
+
+
+def _record_queue(book_side, prices, quantities):
+    """Copies the first resting orders on a side, best price and oldest first, into one row."""
+    store = book_side.store
+    i = 0
+    for level in book_side:
+        for slot in level:
+            if i == len(prices):
+                return
+            prices[i] = level.price
+            quantities[i] = store.quantity[slot]
+            i += 1
+
+
+def record_order_flow(order_book, ticks, depth=None, rng=random):
+    """Steps an order book and records the depth, resting orders and random order sizes a MarketMakerBotAdvanced would see."""
+    depth = order_book.levels if depth is None else depth
+    bid_prices = np.full((ticks, depth), np.nan)
+    ask_prices = np.full((ticks, depth), np.nan)
+    bid_quantities = np.zeros((ticks, depth))
+    ask_quantities = np.zeros((ticks, depth))
+    bid_queue = (np.full((ticks, MAX_ORDER_SIZE), np.nan), np.zeros((ticks, MAX_ORDER_SIZE)))
+    ask_queue = (np.full((ticks, MAX_ORDER_SIZE), np.nan), np.zeros((ticks, MAX_ORDER_SIZE)))
+    buy_sizes = np.zeros(ticks)
+    sell_sizes = np.zeros(ticks)
+    for t in range(ticks):
+        order_book.update_order_book()
+        bids, bid_sizes, asks, ask_sizes = order_book.get_depth(depth)
+        bid_prices[t, :len(bids)] = bids
+        bid_quantities[t, :len(bids)] = bid_sizes
+        ask_prices[t, :len(asks)] = asks
+        ask_quantities[t, :len(asks)] = ask_sizes
+        # Slippage is charged per resting order filled, so the batch needs the queues as well as the level totals
+        _record_queue(order_book.buy_side, bid_queue[0][t], bid_queue[1][t])
+        _record_queue(order_book.sell_side, ask_queue[0][t], ask_queue[1][t])
+        # Same draws as MarketMakerBotAdvanced.tick
+        if rng.random() < 0.5:
+            buy_sizes[t] = rng.randint(5, 20)
+        if rng.random() < 0.5:
+            sell_sizes[t] = rng.randint(5, 20)
+    return OrderFlow(bid_prices, bid_quantities, ask_prices, ask_quantities, buy_sizes, sell_sizes, bid_queue, ask_queue)
+
+
+### Batch Results ###
+class BatchResult:
+    def __init__(self, pnl, cash, inventory, fill_counts, pnl_paths=None, inventory_paths=None):
+        self.pnl = pnl  # Final total assets minus starting cash, per bot
+        self.cash = cash
+        self.inventory = inventory
+        self.fill_counts = fill_counts  # Number of resting orders each bot traded with
+        self.pnl_paths = pnl_paths  # (ticks, bots), or None if paths weren't recorded
+        self.inventory_paths = inventory_paths
+
+
+### Vectorized Market Makers ###
+class BatchMarketMaker:
+    """Runs N MarketMakerBotAdvanced parameter sets at once, holding cash, inventory and fills as arrays.
+
+    Every bot sees the same recorded order flow and trades against it as a price taker, so one bot's
+    fills don't deplete the depth seen by the others. Slippage is charged per resting order filled,
+    like the real bot; flows recorded without queues fall back to one fill per level.
+    """
+    def __init__(self, spread=0.02, inventory_limit=100, slippage_factor=0.001, initial_cash=100000):
+        self.spread, self.inventory_limit, self.slippage_factor = np.broadcast_arrays(
+            np.asarray(spread, dtype=float), np.asarray(inventory_limit, dtype=float), np.asarray(slippage_factor, dtype=float))
+        self.spread = self.spread.ravel()
+        self.inventory_limit = self.inventory_limit.ravel()
+        self.slippage_factor = self.slippage_factor.ravel()
+        self.initial_cash = initial_cash
+
+    @classmethod
+    def from_grid(cls, spreads, inventory_limits, slippage_factors, initial_cash=100000):
+        """Builds one bot for every combination of the given parameter values."""
+        spread, inventory_limit, slippage_factor = np.meshgrid(spreads, inventory_limits, slippage_factors, indexing='ij')
+        return cls(spread, inventory_limit, slippage_factor, initial_cash)
+
+    def __len__(self):
+        return len(self.spread)
+
+    def _fill(self, quote, size, prices, quantities, crosses):
+        """Walks the recorded orders (or levels) for every bot at once; returns filled quantity, slipped cost and trade count."""
+        remaining = np.full(len(self), size)
+        filled = np.zeros(len(self))
+        cost = np.zeros(len(self))
+        trades = np.zeros(len(self), dtype=np.int64)
+        for price, quantity in zip(prices, quantities):
+            if np.isnan(price):
+                break
+            trade_qty = np.where(crosses(quote, price), np.minimum(remaining, quantity), 0.0)
+            executed_price = price * (1 + self.slippage_factor * (trade_qty / self.inventory_limit))
+            cost += executed_price * trade_qty
+            filled += trade_qty
+            remaining -= trade_qty
+            trades += trade_qty > 0
+        return filled, cost, trades
+
+    def run(self, flow, record_paths=True):
+        """Steps every bot through the shared order flow and returns a BatchResult."""
+        n = len(self)
+        cash = np.full(n, float(self.initial_cash))
+        inventory = np.zeros(n)
+        fill_counts = np.zeros(n, dtype=np.int64)
+        pnl_paths = np.empty((len(flow), n)) if record_paths else None
+        inventory_paths = np.empty((len(flow), n)) if record_paths else None
+        half_spread = self.spread / 2
+        for t in range(len(flow)):
+            best_bid = flow.bid_prices[t, 0]
+            best_ask = flow.ask_prices[t, 0]
+            if np.isnan(best_bid) or np.isnan(best_ask):
+                bid, ask = 100 * (1 - half_spread), 100 * (1 + half_spread)
+            else:
+                bid, ask = best_bid * (1 - half_spread), best_ask * (1 + half_spread)
+
+            # Like MarketMakerBotAdvanced.execute_order, a buy at the ask fills against the bids and a sell at the bid against the asks
+            if flow.buy_sizes[t] > 0:
+                prices, quantities = (flow.bid_queue[0][t], flow.bid_queue[1][t]) if flow.bid_queue is not None else (flow.bid_prices[t], flow.bid_quantities[t])
+                filled, cost, trades = self._fill(ask, flow.buy_sizes[t], prices, quantities, np.less_equal)
+                inventory += filled
+                cash -= cost
+                fill_counts += trades
+            if flow.sell_sizes[t] > 0:
+                prices, quantities = (flow.ask_queue[0][t], flow.ask_queue[1][t]) if flow.ask_queue is not None else (flow.ask_prices[t], flow.ask_quantities[t])
+                filled, cost, trades = self._fill(bid, flow.sell_sizes[t], prices, quantities, np.greater_equal)
+                inventory -= filled
+                cash += cost
+                fill_counts += trades
+
+            if record_paths:
+                # Marked at the best bid, like PerformanceTracker.track
+                mark = 0.0 if np.isnan(best_bid) else best_bid
+                pnl_paths[t] = cash + inventory * mark - self.initial_cash
+                inventory_paths[t] = inventory
+
+        last_bid = flow.bid_prices[-1, 0] if len(flow) else np.nan
+        pnl = cash + inventory * (0.0 if np.isnan(last_bid) else last_bid) - self.initial_cash
+        return BatchResult(pnl, cash, inventory, fill_counts, pnl_paths, inventory_paths)
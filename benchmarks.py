@@ -0,0 +1,162 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+from advancedorderbook import AdvancedOrderBook
+from marketmakerbotadvanced import MarketMakerBotAdvanced
+from orderbook import Order
+from simclock import SimulatedClock
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000, 1000000)
+
+def random_resting_order(rng):
+    """Side and price of a non-crossing order on 0.01 ticks: bids from 90 to 99.99, asks from 100.01 to 110."""
+    if rng.random() < 0.5:
+        return 'buy', round(rng.uniform(90, 99.99), 2)
+    return 'sell', round(rng.uniform(100.01, 110), 2)
+
+
+def build_book(size, rng):
+    """Builds a book with `size` resting orders."""
+    order_book = AdvancedOrderBook(clock=SimulatedClock(), rng=rng)
+    for _ in range(size):
+        order_book.add_order(*random_resting_order(rng), rng.randint(50, 150))
+    return order_book
+
+
+def summarize(samples_ns):
+    """Turns per-operation latencies into throughput and percentiles."""
+    samples = np.asarray(samples_ns, dtype=np.float64)
+    return {
+        'ops_per_sec': len(samples) / (samples.sum() / 1e9),
+        'p50_us': float(np.percentile(samples, 50)) / 1e3,
+        'p99_us': float(np.percentile(samples, 99)) / 1e3,
+        'p999_us': float(np.percentile(samples, 99.9)) / 1e3,
+    }
+
+
+def bench_book(size, ops, rng):
+    """Times add, cancel, match and top-of-book on a book of the given depth, keeping its size roughly constant."""
+    order_book = build_book(size, rng)
+    clock = time.perf_counter_ns
+    results = {}
+
+    samples = []
+    for _ in range(ops):
+        side, price = random_resting_order(rng)
+        start = clock()
+        order_book.add_order(side, price, 100)
+        samples.append(clock() - start)
+    results['add_order'] = summarize(samples)
+
+    samples = []
+    resting = list(order_book.order_map)
+    for order_id in rng.sample(resting, min(ops, len(resting))):
+        start = clock()
+        order_book.cancel_order(order_id)
+        samples.append(clock() - start)
+    results['cancel_order'] = summarize(samples)
+    for _ in range(len(samples)):  # Put the book back to its original depth
+        order_book.add_order(*random_resting_order(rng), 100)
+
+    samples = []
+    for _ in range(ops):
+        incoming = Order(-1, 'buy', 110, 1, 'market')
+        start = clock()
+        order_book.match_buy_order(incoming)
+        samples.append(clock() - start)
+    results['match_buy_order'] = summarize(samples)
+
+    samples = []
+    for _ in range(ops):
+        start = clock()
+        order_book.get_top_of_book()
+        samples.append(clock() - start)
+    results['get_top_of_book'] = summarize(samples)
+
+    bot = MarketMakerBotAdvanced(clock=order_book.clock, rng=rng)
+    bot.set_order_book(order_book)
+    samples = []
+    for _ in range(ops):
+        start = clock()
+        bot.tick()
+        samples.append(clock() - start)
+        order_book.clock.sleep(0.1)
+    results['market_make_tick'] = summarize(samples)
+    return results
+
+
+def peak_memory(size, rng):
+    """Peak traced allocation, in MB, while building a book of the given depth."""
+    tracemalloc.start()
+    order_book = build_book(size, rng)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del order_book
+    return peak / 1e6
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, ops=2000, seed=0):
+    """Runs every benchmark at every book size and returns a JSON-serializable report."""
+    results = {}
+    for size in sizes:
+        rng = random.Random(seed)
+        size_results = bench_book(size, ops, rng)
+        size_results['peak_memory_mb'] = peak_memory(size, random.Random(seed))
+        results[str(size)] = size_results
+        print(f"size {size:>8}: " + ", ".join(f"{name} {stats['ops_per_sec']:,.0f} ops/s"
+                                               for name, stats in size_results.items() if isinstance(stats, dict))
+              + f", peak {size_results['peak_memory_mb']:.1f} MB", file=sys.stderr)
+    return {
+        'meta': {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+                 'timestamp': time.time(), 'ops': ops, 'seed': seed},
+        'results': results,
+    }
+
+
+def find_regressions(report, baseline, threshold=0.1):
+    """Lists benchmarks that got slower (throughput or p99) or bigger by more than `threshold` versus a baseline."""
+    regressions = []
+    for size, size_results in report['results'].items():
+        base_results = baseline['results'].get(size)
+        if base_results is None:
+            continue
+        for name, stats in size_results.items():
+            base = base_results.get(name)
+            if base is None:
+                continue
+            if name == 'peak_memory_mb':
+                if stats > base * (1 + threshold):
+                    regressions.append(f"size {size} {name}: {base:.1f} -> {stats:.1f} MB")
+                continue
+            if stats['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold):
+                regressions.append(f"size {size} {name}: {base['ops_per_sec']:,.0f} -> {stats['ops_per_sec']:,.0f} ops/s")
+            if stats['p99_us'] > base['p99_us'] * (1 + threshold):
+                regressions.append(f"size {size} {name}: p99 {base['p99_us']:.1f} -> {stats['p99_us']:.1f} us")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Order book and bot benchmarks across book depths.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='Resting order counts to test')
+    parser.add_argument('--ops', type=int, default=2000, help='Timed operations per benchmark')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='Write the report to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a previously saved JSON report')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Allowed relative slowdown before flagging a regression')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.ops, args.seed)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,72 @@
+import json
+import math
+import numpy as np
+from simclock import SimulatedClock
+
+def _rng_arrays(rng):
+    """Encodes a random.Random (or the random module) state as arrays."""
+    version, internal, gauss_next = rng.getstate()
+    return {'rng_state': np.array(internal + (version,), dtype=np.int64),
+            'rng_gauss': np.float64(math.nan if gauss_next is None else gauss_next)}
+
+
+def _set_rng(rng, state):
+    values = state['rng_state'].tolist()
+    gauss_next = float(state['rng_gauss'])
+    rng.setstate((values[-1], tuple(values[:-1]), None if math.isnan(gauss_next) else gauss_next))
+
+
+def _np_rng_array(np_rng):
+    """Encodes a NumPy Generator's bit generator state (nested dicts of big ints) as a JSON string array."""
+    return np.array(json.dumps(np_rng.bit_generator.state))
+
+
+def _set_np_rng(np_rng, state):
+    np_rng.bit_generator.state = json.loads(str(state['np_rng_state']))
+
+
+def _sections(order_book, bots):
+    """(section, owner) pairs saved for a book, its order flow generator if any, and its bots."""
+    sections = [('book', order_book)]
+    if getattr(order_book, 'order_flow', None) is not None:
+        sections.append(('flow', order_book.order_flow))
+    return sections + [(f'bot{i}', bot) for i, bot in enumerate(bots)]
+
+
+def save_snapshot(path, order_book, bots=()):
+    """Writes a book, its order flow generator, its bots, their RNGs and the clock time to one .npz file."""
+    arrays = {'clock': np.float64(order_book.clock.time())}
+    for section, owner in _sections(order_book, bots):
+        state = owner.snapshot()
+        if hasattr(owner, 'rng'):
+            state.update(_rng_arrays(owner.rng))
+        if hasattr(owner, 'np_rng'):
+            state['np_rng_state'] = _np_rng_array(owner.np_rng)
+        arrays.update({f'{section}/{name}': value for name, value in state.items()})
+    np.savez(path, **arrays)  # Uncompressed, so loading is a straight copy of the columns
+
+
+def load_snapshot(path, order_book, bots=(), restore_rng=True):
+    """Restores a save_snapshot() file into a book and bots built with the same settings.
+
+    A SimulatedClock is moved to the snapshot time. To fork what-if runs from one state, load the
+    file once per run with restore_rng=False and give each run's book and bots their own seeded rng.
+    """
+    sections = {}
+    with np.load(path) as data:
+        for key in data.files:
+            section, _, name = key.partition('/')
+            sections.setdefault(section, {})[name] = data[key]
+    if getattr(order_book, 'order_flow', None) is not None and 'flow' not in sections:
+        raise ValueError("snapshot has no order flow state; the book's order_flow would replay from its start")
+    if isinstance(order_book.clock, SimulatedClock):
+        order_book.clock.now = float(sections['clock'][''])
+    for section, owner in _sections(order_book, bots):
+        state = sections[section]
+        owner.restore(state)
+        if restore_rng:
+            if 'rng_state' in state:
+                _set_rng(owner.rng, state)
+            if 'np_rng_state' in state:
+                _set_np_rng(owner.np_rng, state)
+    return order_book
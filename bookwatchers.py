@@ -0,0 +1,50 @@
+import numpy as np
+
+### Top-of-Book Watcher ###
+class TopOfBookWatcher:
+    """Book listener that calls back only when the best bid or ask moves (or, with sizes, their sizes change).
+
+    The callback gets (best_bid, bid_size, best_ask, ask_size); prices are None for an empty side.
+    """
+    def __init__(self, callback, sizes=False):
+        self.callback = callback
+        self.sizes = sizes
+        self.last = None  # Last published (bid, bid_size, ask, ask_size)
+
+    def on_book_update(self, order_book):
+        bid_level = order_book.buy_side.best_level()
+        ask_level = order_book.sell_side.best_level()
+        top = (bid_level.price if bid_level else None, bid_level.quantity if bid_level else 0,
+               ask_level.price if ask_level else None, ask_level.quantity if ask_level else 0)
+        last = self.last
+        if last is not None and top[0] == last[0] and top[2] == last[2] and (not self.sizes or (top[1] == last[1] and top[3] == last[3])):
+            return
+        self.last = top
+        self.callback(*top)
+
+    def on_trade(self, price, quantity, side, timestamp):
+        pass
+
+
+### Depth Watcher ###
+class DepthWatcher:
+    """Book listener that calls back with get_depth(n) only when the top n levels change.
+
+    The book's depth cache is only invalidated by changes that reach the cached levels, so most
+    updates cost a cache hit and an identity check.
+    """
+    def __init__(self, n, callback):
+        self.n = n
+        self.callback = callback
+        self.last = None  # Last published depth arrays
+
+    def on_book_update(self, order_book):
+        depth = order_book.get_depth(self.n)
+        last = self.last
+        if last is not None and all(new is old or np.array_equal(new, old) for new, old in zip(depth, last)):
+            return
+        self.last = depth
+        self.callback(*depth)
+
+    def on_trade(self, price, quantity, side, timestamp):
+        pass
@@ -0,0 +1,85 @@
+import numpy as np
+from orderstore import BUY, SELL, SIDE_NAMES
+
+# Event types; fills are the bot's own trades, trades are the book's resting orders being filled
+QUOTE, FILL, ADD, CANCEL, MODIFY, TRADE = 0, 1, 2, 3, 4, 5
+EVENT_NAMES = ('quote', 'fill', 'add', 'cancel', 'modify', 'trade')
+
+# Fixed-width on-disk record, 34 bytes per event
+EVENT_DTYPE = np.dtype([
+    ('timestamp', np.float64),
+    ('event', np.uint8),
+    ('side', np.int8),  # BUY/SELL code, from the bot's side for quotes and fills and the resting order's otherwise
+    ('order_id', np.int64),
+    ('price', np.float64),
+    ('quantity', np.float64),
+])
+
+def read_journal(path, mmap=True):
+    """Loads a journal as a structured NumPy array; memory-mapped by default so large files load lazily."""
+    if mmap:
+        return np.memmap(path, dtype=EVENT_DTYPE, mode='r')
+    return np.fromfile(path, dtype=EVENT_DTYPE)
+
+
+### Print Sink ###
+class PrintSink:
+    """Human-readable output for a journal, for interactive runs."""
+    def __call__(self, timestamp, event, side, order_id, price, quantity):
+        side_name = SIDE_NAMES[side].upper()
+        if event == QUOTE:
+            print(f"Bot Quoting: {'Bid' if side == BUY else 'Ask'} {price:.2f}")
+        elif event == FILL:
+            print(f"Executed {side_name} for {quantity:g} @ {price:.2f}")
+        else:
+            print(f"{EVENT_NAMES[event].capitalize()} {side_name} order {order_id}: {quantity:g} @ {price:.2f}")
+
+
+### Event Journal ###
+class EventJournal:
+    """Append-only binary journal of quotes, fills and book updates.
+
+    Events are packed into a preallocated record buffer and written to disk in blocks, so the
+    hot loop never formats text or touches the terminal. Sinks such as PrintSink get every
+    event as it is recorded.
+    """
+    def __init__(self, path=None, buffer_size=65536, sinks=()):
+        self.file = open(path, 'ab') if path is not None else None
+        self.buffer = np.empty(buffer_size, dtype=EVENT_DTYPE)
+        self.count = 0  # Events waiting in the buffer
+        self.sinks = list(sinks)
+
+    def record(self, timestamp, event, side, order_id, price, quantity):
+        if self.file is not None:
+            if self.count == len(self.buffer):
+                self.flush()
+            self.buffer[self.count] = (timestamp, event, side, order_id, price, quantity)
+            self.count += 1
+        for sink in self.sinks:
+            sink(timestamp, event, side, order_id, price, quantity)
+
+    def record_quote(self, timestamp, bid, ask):
+        self.record(timestamp, QUOTE, BUY, -1, bid, 0)
+        self.record(timestamp, QUOTE, SELL, -1, ask, 0)
+
+    def record_fill(self, timestamp, side, order_id, price, quantity):
+        self.record(timestamp, FILL, side, order_id, price, quantity)
+
+    def flush(self):
+        """Writes buffered events to disk."""
+        if self.file is not None and self.count:
+            self.buffer[:self.count].tofile(self.file)
+            self.file.flush()
+            self.count = 0
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
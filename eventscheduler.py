@@ -0,0 +1,33 @@
+import heapq
+from simclock import SimulatedClock
+
+### Discrete-Event Scheduler ###
+class EventScheduler:
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.events = []  # Min-heap of (time, sequence, callback, args)
+        self.sequence = 0  # Tie-breaker so events due at the same time run in the order they were scheduled
+
+    def __len__(self):
+        return len(self.events)
+
+    def schedule_at(self, timestamp, callback, *args):
+        """Schedules a callback to run at an absolute clock time."""
+        heapq.heappush(self.events, (timestamp, self.sequence, callback, args))
+        self.sequence += 1
+
+    def schedule(self, delay, callback, *args):
+        """Schedules a callback to run after a delay from the current clock time."""
+        self.schedule_at(self.clock.time() + delay, callback, *args)
+
+    def run(self, until=None):
+        """Runs events in time order, moving the clock to each one, and returns how many ran."""
+        processed = 0
+        while self.events and (until is None or self.events[0][0] <= until):
+            timestamp, _, callback, args = heapq.heappop(self.events)
+            self.clock.sleep_until(timestamp)
+            callback(*args)
+            processed += 1
+        if until is not None:
+            self.clock.sleep_until(until)
+        return processed
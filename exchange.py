@@ -0,0 +1,206 @@
+import os
+import time
+import random
+import multiprocessing as mp
+import numpy as np
+from advancedorderbook import AdvancedOrderBook
+from marketmakerbotadvanced import MarketMakerBotAdvanced
+from orderstore import SIDE_CODES
+from sharedblock import SharedBlock
+from simclock import SimulatedClock
+
+# Fixed-width messages exchanged between the router and the shard workers
+ORDER_DTYPE = np.dtype([('symbol', np.int32), ('side', np.int8), ('price', np.float64), ('quantity', np.int64), ('client_id', np.int64)])
+FILL_DTYPE = np.dtype([('symbol', np.int32), ('client_id', np.int64), ('maker_id', np.int64), ('price', np.float64), ('quantity', np.int64)])
+
+### Shared-Memory Queue ###
+class SharedRingQueue(SharedBlock):
+    """Single-producer, single-consumer ring buffer of fixed-width records in shared memory.
+
+    The first 16 bytes hold the read and write counters; records follow. The producer only moves
+    the write counter and the consumer only moves the read counter, so no lock is needed.
+    """
+    HEADER_BYTES = 16
+    VIEWS = ('counters', 'records')
+
+    def __init__(self, dtype, capacity=65536, name=None):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self._open(self.HEADER_BYTES + capacity * self.dtype.itemsize, name)
+        self.counters = np.ndarray(2, dtype=np.uint64, buffer=self.shm.buf)  # [read, write]
+        self.records = np.ndarray(capacity, dtype=self.dtype, buffer=self.shm.buf, offset=self.HEADER_BYTES)
+        if self.owner:
+            self.counters[:] = 0
+
+    @property
+    def spec(self):
+        """Picklable arguments for re-attaching from another process."""
+        return self.dtype.descr, self.capacity, self.shm.name
+
+    @classmethod
+    def attach(cls, descr, capacity, name):
+        return cls(np.dtype(descr), capacity, name)
+
+    def __len__(self):
+        return int(self.counters[1] - self.counters[0])
+
+    def put_many(self, records):
+        """Appends as many records as fit and returns how many were written."""
+        read, write = int(self.counters[0]), int(self.counters[1])
+        count = min(len(records), self.capacity - (write - read))
+        start = write % self.capacity
+        first = min(count, self.capacity - start)
+        self.records[start:start + first] = records[:first]
+        self.records[:count - first] = records[first:count]
+        self.counters[1] = write + count  # Publish only after the records are written
+        return count
+
+    def get_many(self, max_count=None):
+        """Removes and returns up to max_count records (all available by default) as a copy."""
+        read, write = int(self.counters[0]), int(self.counters[1])
+        count = write - read if max_count is None else min(max_count, write - read)
+        start = read % self.capacity
+        first = min(count, self.capacity - start)
+        out = np.concatenate((self.records[start:start + first], self.records[:count - first]))
+        self.counters[0] = read + count
+        return out
+
+
+### Shard Worker ###
+def _put_all(queue, records, on_wait=None):
+    """Writes every record, waiting for the consumer when the queue is full."""
+    written = 0
+    while written < len(records):
+        written += queue.put_many(records[written:])
+        if written < len(records):
+            if on_wait is not None:
+                on_wait()
+            time.sleep(0.0001)
+
+
+def _run_shard(symbol_ids, order_spec, fill_spec, results, stop_event, ticks, interval, seed, bot_params):
+    """Owns the books and market-maker bots for a subset of symbols and serves routed orders."""
+    order_queue = SharedRingQueue.attach(*order_spec)
+    fill_queue = SharedRingQueue.attach(*fill_spec)
+    clock = SimulatedClock()
+    books, bots = {}, {}
+    for symbol_id in symbol_ids:
+        books[symbol_id] = AdvancedOrderBook(clock=clock, rng=random.Random(seed + 2 * symbol_id))
+        bots[symbol_id] = MarketMakerBotAdvanced(clock=clock, rng=random.Random(seed + 2 * symbol_id + 1), latency=0, **bot_params)
+        bots[symbol_id].set_order_book(books[symbol_id])
+
+    tick = 0
+    while tick < ticks or not stop_event.is_set():
+        orders = order_queue.get_many()
+        for symbol_id in np.unique(orders['symbol']).tolist():
+            symbol_orders = orders[orders['symbol'] == symbol_id]  # Keeps arrival order within the symbol
+            takers, maker_ids, prices, quantities = books[symbol_id].match_orders_batch(
+                symbol_orders['side'], symbol_orders['price'], symbol_orders['quantity'])
+            if len(takers):
+                fills = np.empty(len(takers), dtype=FILL_DTYPE)
+                fills['symbol'] = symbol_id
+                fills['client_id'] = symbol_orders['client_id'][takers]
+                fills['maker_id'] = maker_ids
+                fills['price'] = prices
+                fills['quantity'] = quantities
+                _put_all(fill_queue, fills)
+        if tick < ticks:
+            for bot in bots.values():
+                bot.tick()
+            clock.sleep(interval)
+            tick += 1
+        elif not len(orders):
+            time.sleep(0.0005)  # Idle until more orders arrive or we're told to stop
+
+    results.put({symbol_id: {'cash': bot.cash, 'inventory': bot.inventory, 'resting_orders': len(books[symbol_id].order_map)}
+                 for symbol_id, bot in bots.items()})
+    order_queue.close()
+    fill_queue.close()
+
+
+### Exchange ###
+class Exchange:
+    """Many symbols, each with its own AdvancedOrderBook and market maker, sharded across worker processes.
+
+    Orders are routed by symbol to the owning shard over a shared-memory queue, and fills come back
+    the same way, so throughput scales with the number of cores.
+    """
+    def __init__(self, symbols, n_workers=None, ticks=600, interval=0.1, seed=0, bot_params=None, queue_capacity=65536):
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.n_workers = min(n_workers or os.cpu_count(), len(self.symbols))
+        self.ticks = ticks
+        self.interval = interval
+        self.seed = seed
+        self.bot_params = bot_params or {}
+        self.queue_capacity = queue_capacity
+        self.order_queues = []
+        self.fill_queues = []
+        self.workers = []
+        self.pending_fills = []  # Fills drained while waiting on a full order queue
+
+    def shard_of(self, symbol):
+        return self.symbol_ids[symbol] % self.n_workers
+
+    def start(self):
+        """Creates the queues and starts one worker process per shard."""
+        self.results = mp.Queue()
+        self.stop_event = mp.Event()
+        for shard in range(self.n_workers):
+            order_queue = SharedRingQueue(ORDER_DTYPE, self.queue_capacity)
+            fill_queue = SharedRingQueue(FILL_DTYPE, self.queue_capacity)
+            symbol_ids = list(range(shard, len(self.symbols), self.n_workers))
+            worker = mp.Process(target=_run_shard, args=(symbol_ids, order_queue.spec, fill_queue.spec, self.results,
+                                                         self.stop_event, self.ticks, self.interval, self.seed, self.bot_params))
+            worker.start()
+            self.order_queues.append(order_queue)
+            self.fill_queues.append(fill_queue)
+            self.workers.append(worker)
+
+    def submit_order(self, symbol, side, price, quantity, client_id=0):
+        """Routes one order to its symbol's shard; returns False if that shard's queue is full."""
+        record = np.array([(self.symbol_ids[symbol], SIDE_CODES[side], price, quantity, client_id)], dtype=ORDER_DTYPE)
+        return self.order_queues[self.shard_of(symbol)].put_many(record) == 1
+
+    def submit_orders(self, orders):
+        """Routes an ORDER_DTYPE array, waiting on full queues so no order is dropped."""
+        shards = orders['symbol'] % self.n_workers
+        for shard in np.unique(shards).tolist():
+            # Keep draining fills while waiting, or a shard blocked on its fill queue would never free order space
+            _put_all(self.order_queues[shard], orders[shards == shard], self._drain_fills)
+
+    def _drain_fills(self):
+        self.pending_fills.extend(queue.get_many() for queue in self.fill_queues)
+
+    def poll_fills(self):
+        """Drains and returns the fills reported so far by every shard."""
+        self._drain_fills()
+        fills = np.concatenate(self.pending_fills)
+        self.pending_fills = []
+        return fills
+
+    def stop(self):
+        """Lets the shards finish their ticks, then returns {symbol: bot summary} and any unread fills."""
+        self.stop_event.set()
+        summaries = {}
+        fills = []
+        while len(summaries) < len(self.symbols):
+            fills.append(self.poll_fills())  # Keep draining so no shard blocks on a full fill queue
+            while not self.results.empty():
+                summaries.update(self.results.get())
+            time.sleep(0.001)
+        fills.append(self.poll_fills())
+        for worker in self.workers:
+            worker.join()
+        for queue in self.order_queues + self.fill_queues:
+            queue.close()
+        self.workers, self.order_queues, self.fill_queues = [], [], []
+        return {self.symbols[symbol_id]: summary for symbol_id, summary in summaries.items()}, np.concatenate(fills)
+
+
+if __name__ == '__main__':
+    exchange = Exchange([f'SYM{i:03d}' for i in range(64)], ticks=600)
+    exchange.start()
+    start = time.time()
+    summaries, fills = exchange.stop()
+    print(f"{len(summaries)} symbols on {exchange.n_workers} workers in {time.time() - start:.2f}s, {len(fills)} client fills")
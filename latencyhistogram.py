@@ -0,0 +1,102 @@
+import time
+import numpy as np
+
+# Log-scale buckets: values below 16ns get their own bucket, then every power of two is split into
+# 2**SUB_BUCKET_BITS buckets, so a bucket's bounds are within 12.5% of any value in it
+SUB_BUCKET_BITS = 3
+MAX_SHIFT = 40  # Values of about 18 minutes and above share the last bucket
+N_BUCKETS = (MAX_SHIFT << SUB_BUCKET_BITS) + (2 << SUB_BUCKET_BITS)
+_shifts = np.maximum((np.arange(N_BUCKETS) >> SUB_BUCKET_BITS) - 1, 0)
+BUCKET_UPPER_NS = ((np.arange(N_BUCKETS) - (_shifts << SUB_BUCKET_BITS)) << _shifts) + (1 << _shifts) - 1  # Largest value in each bucket
+
+
+### Latency Histogram ###
+class LatencyHistogram:
+    """Fixed-bucket log-scale histogram of nanosecond latencies; recording is O(1) and never allocates."""
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS  # A list, since scalar increments are cheaper than on a NumPy array
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns):
+        shift = ns.bit_length() - SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            self.counts[ns] += 1
+        else:
+            self.counts[min((shift << SUB_BUCKET_BITS) + (ns >> shift), N_BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, q):
+        """Upper bound, in nanoseconds, of the bucket holding the q-th percentile."""
+        if not self.count:
+            return 0
+        rank = max(1, int(np.ceil(q / 100 * self.count)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        return min(int(BUCKET_UPPER_NS[index]), self.max)
+
+    def merge(self, other):
+        """Adds another histogram's samples to this one."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def reset(self):
+        self.__init__()
+
+    def snapshot(self):
+        """Count, mean, p50/p99/p99.9 and max, in microseconds."""
+        return {
+            'count': self.count,
+            'mean_us': self.total / self.count / 1e3 if self.count else 0.0,
+            'p50_us': self.percentile(50) / 1e3,
+            'p99_us': self.percentile(99) / 1e3,
+            'p999_us': self.percentile(99.9) / 1e3,
+            'max_us': self.max / 1e3,
+        }
+
+
+### Stage Latencies ###
+class StageLatencies:
+    """A LatencyHistogram per named hot-path stage, in the order the stages were first seen."""
+    def __init__(self):
+        self.histograms = {}
+
+    def __getitem__(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        return histogram
+
+    def record(self, stage, ns):
+        self[stage].record(ns)
+
+    def timed(self, stage, func):
+        """Wraps func so every call is recorded under `stage`."""
+        histogram = self[stage]
+        clock = time.perf_counter_ns
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            result = func(*args, **kwargs)
+            histogram.record(clock() - start)
+            return result
+        return wrapper
+
+    def snapshot(self):
+        """{stage: percentiles}, see LatencyHistogram.snapshot."""
+        return {stage: histogram.snapshot() for stage, histogram in self.histograms.items()}
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+
+    def report(self):
+        """One line per stage, for logs."""
+        return "\n".join(f"{stage:<18} n={stats['count']:<8} p50 {stats['p50_us']:8.1f}us  p99 {stats['p99_us']:8.1f}us  "
+                         f"p99.9 {stats['p999_us']:8.1f}us  max {stats['max_us']:8.1f}us"
+                         for stage, stats in self.snapshot().items())
@@ -0,0 +1,165 @@
+import time
+import multiprocessing as mp
+import numpy as np
+from performancetracker import book_mark_price
+from sharedblock import SharedBlock
+
+STAGES = ('update_order_book', 'quote', 'matching', 'booking', 'tracker')  # Stages timed by an instrumented MarketMakerBotAdvanced
+
+def snapshot_dtype(depth, n_stages):
+    """Record layout for one published snapshot."""
+    return np.dtype([
+        ('timestamp', np.float64),
+        ('ticks', np.int64),
+        ('bid_prices', np.float64, (depth,)),  # NaN where a level is missing
+        ('bid_sizes', np.int64, (depth,)),
+        ('ask_prices', np.float64, (depth,)),
+        ('ask_sizes', np.int64, (depth,)),
+        ('cash', np.float64),
+        ('inventory', np.int64),
+        ('pnl', np.float64),
+        ('stage_p50_us', np.float64, (n_stages,)),
+        ('stage_p99_us', np.float64, (n_stages,)),
+        ('stage_p999_us', np.float64, (n_stages,)),
+    ])
+
+
+### Shared Snapshot ###
+class SharedSnapshot(SharedBlock):
+    """One snapshot record in shared memory, guarded by a seqlock.
+
+    The first 8 bytes hold a sequence number that the single writer makes odd while it writes and
+    even again once done. Readers copy the record and retry if the sequence was odd or moved, so
+    they never see a torn snapshot and never block the writer.
+    """
+    HEADER_BYTES = 8
+    VIEWS = ('sequence', 'record', 'raw')
+
+    def __init__(self, depth=5, stages=STAGES, name=None):
+        self.depth = depth
+        self.stages = tuple(stages)
+        self.dtype = snapshot_dtype(depth, len(self.stages))
+        self._open(self.HEADER_BYTES + self.dtype.itemsize, name)
+        self.sequence = np.ndarray(1, dtype=np.uint64, buffer=self.shm.buf)
+        self.record = np.ndarray((), dtype=self.dtype, buffer=self.shm.buf, offset=self.HEADER_BYTES)  # Zero-copy, may be mid-write
+        self.raw = np.ndarray(self.dtype.itemsize, dtype=np.uint8, buffer=self.shm.buf, offset=self.HEADER_BYTES)
+        if self.owner:
+            self.sequence[0] = 0
+            self.record[...] = np.zeros((), dtype=self.dtype)
+
+    @property
+    def spec(self):
+        """Picklable arguments for re-attaching from another process."""
+        return self.depth, self.stages, self.shm.name
+
+    @classmethod
+    def attach(cls, depth, stages, name):
+        return cls(depth, stages, name)
+
+    def write(self, record):
+        """Publishes a record, or its raw bytes (writer process only)."""
+        sequence = int(self.sequence[0])
+        self.sequence[0] = sequence + 1  # Odd: write in progress
+        # Copy as raw bytes, a plain memcpy; field-wise structured assignment is much slower
+        self.raw[:] = record if record.dtype == np.uint8 else record.reshape(1).view(np.uint8)
+        self.sequence[0] = sequence + 2
+
+    def read(self):
+        """Returns a consistent copy of the latest record and its sequence number (0 if nothing is published yet)."""
+        while True:
+            start = int(self.sequence[0])
+            if start % 2 == 0:
+                record = self.record.copy()
+                if int(self.sequence[0]) == start:
+                    return record, start // 2
+            time.sleep(0)  # Let the writer finish
+
+
+### Live Snapshot Publisher ###
+class LiveSnapshotPublisher:
+    """Publishes a bot's book depth, cash, inventory, PnL and stage latencies to a SharedSnapshot.
+
+    Pass it to market_make as the performance_tracker (it forwards to a wrapped PerformanceTracker
+    if given). Stage percentiles cost more to compute, so they're refreshed every stats_every ticks.
+    """
+    def __init__(self, depth=5, stages=STAGES, initial_cash=100000, tracker=None, publish_every=1, stats_every=100):
+        self.shared = SharedSnapshot(depth, stages)
+        self.initial_cash = initial_cash
+        self.tracker = tracker
+        self.publish_every = publish_every
+        self.stats_every = stats_every
+        self.staging = np.zeros((), dtype=self.shared.dtype)  # Filled in place, then copied in one go under the seqlock
+        self.staging_raw = self.staging.reshape(1).view(np.uint8)
+        self.fields = {name: self.staging[name] for name in self.shared.dtype.names}  # Views, so filling skips field lookups
+        self.depth = None  # Last depth arrays published; the book's cache returns the same objects until the top n change
+        self.ticks = 0
+
+    @property
+    def spec(self):
+        return self.shared.spec
+
+    def track(self, bot, mark_price=None):
+        """PerformanceTracker-compatible hook, called once per tick."""
+        if self.tracker is not None:
+            self.tracker.track(bot, mark_price)
+        self.ticks += 1
+        if self.ticks % self.publish_every == 0:
+            self.publish(bot, mark_price)
+
+    def publish(self, bot, mark_price=None):
+        order_book = bot.order_book
+        fields = self.fields
+        if hasattr(order_book, 'get_depth'):
+            depth = order_book.get_depth(self.shared.depth)  # Cached
+            if depth is not self.depth and any(new is not old for new, old in zip(depth, self.depth or (None,) * 4)):
+                for name, values in zip(('bid_prices', 'bid_sizes', 'ask_prices', 'ask_sizes'), depth):
+                    fields[name][:] = np.nan if name.endswith('prices') else 0
+                    fields[name][:len(values)] = values
+                self.depth = depth
+        if mark_price is None:
+            mark_price = book_mark_price(order_book)
+        fields['timestamp'][...] = bot.clock.time()
+        fields['ticks'][...] = self.ticks
+        fields['cash'][...] = bot.cash
+        fields['inventory'][...] = bot.inventory
+        fields['pnl'][...] = bot.cash + (mark_price * bot.inventory if mark_price is not None else 0) - self.initial_cash
+        latency_stats = getattr(bot, 'latency_stats', None)
+        if latency_stats is not None and self.ticks % self.stats_every == 0:
+            snapshot = latency_stats.snapshot()
+            for i, stage in enumerate(self.shared.stages):
+                stats = snapshot.get(stage)
+                if stats is not None:
+                    fields['stage_p50_us'][i] = stats['p50_us']
+                    fields['stage_p99_us'][i] = stats['p99_us']
+                    fields['stage_p999_us'][i] = stats['p999_us']
+        self.shared.write(self.staging_raw)
+
+    def close(self):
+        self.shared.close()
+
+
+def _watch(spec, polls, interval):
+    """Demo reader: prints the latest snapshot a few times from another process."""
+    reader = SharedSnapshot.attach(*spec)
+    for _ in range(polls):
+        time.sleep(interval)
+        record, version = reader.read()
+        print(f"v{version} tick {record['ticks']}: bid {record['bid_prices'][0]:.2f} ask {record['ask_prices'][0]:.2f} "
+              f"inventory {record['inventory']} PnL {record['pnl']:.2f} matching p99 {record['stage_p99_us'][2]:.1f}us")
+    reader.close()
+
+
+if __name__ == '__main__':
+    from advancedorderbook import AdvancedOrderBook
+    from marketmakerbotadvanced import MarketMakerBotAdvanced
+
+    # Trade in this process and watch from another one
+    order_book = AdvancedOrderBook()
+    bot = MarketMakerBotAdvanced(latency=0.01, instrument=True)
+    bot.set_order_book(order_book)
+    publisher = LiveSnapshotPublisher(stats_every=10)
+    watcher = mp.Process(target=_watch, args=(publisher.spec, 5, 0.5))
+    watcher.start()
+    bot.market_make(duration=3, interval=0.05, performance_tracker=publisher)
+    watcher.join()
+    publisher.close()
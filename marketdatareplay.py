@@ -0,0 +1,116 @@
+import csv
+import numpy as np
+from eventjournal import EVENT_DTYPE, ADD, CANCEL, MODIFY, TRADE
+from orderstore import BUY, SELL, SIDE_NAMES
+
+# Market data messages share the event journal's record layout, so journals can be replayed too.
+# The bot's own quotes and fills in a journal are skipped; the book events alone rebuild the book.
+MESSAGE_DTYPE = EVENT_DTYPE
+EXECUTE = TRADE  # A resting order traded for the given quantity
+CSV_MESSAGE_CODES = {'add': ADD, 'a': ADD, 'cancel': CANCEL, 'd': CANCEL, 'x': CANCEL, 'execute': EXECUTE, 'e': EXECUTE}
+CSV_SIDE_CODES = {'buy': BUY, 'b': BUY, 'bid': BUY, 'sell': SELL, 's': SELL, 'ask': SELL}
+
+def csv_to_messages(csv_path, out_path, chunk_size=100000):
+    """Converts an L3 CSV (timestamp, type, side, order_id, price, quantity) to the binary message format.
+
+    Rows are converted in chunks, so the CSV never has to fit in memory. Returns the number of messages written.
+    """
+    chunk = np.empty(chunk_size, dtype=MESSAGE_DTYPE)
+    written = 0
+    count = 0
+    with open(csv_path, newline='') as src, open(out_path, 'wb') as dst:
+        for row in csv.DictReader(src):
+            chunk[count] = (
+                float(row['timestamp']),
+                CSV_MESSAGE_CODES[row['type'].strip().lower()],
+                CSV_SIDE_CODES[row['side'].strip().lower()],
+                int(row['order_id']),
+                float(row['price'] or 0),
+                float(row['quantity'] or 0),
+            )
+            count += 1
+            if count == chunk_size:
+                chunk.tofile(dst)
+                written += count
+                count = 0
+        chunk[:count].tofile(dst)
+        written += count
+    return written
+
+
+def apply_messages(order_book, messages, clock=None, until=None, id_map=None):
+    """Applies a block of MESSAGE_DTYPE records to the book in order and returns how many were applied.
+
+    If a SimulatedClock is given it follows the message timestamps; application stops before the
+    first message stamped after `until`. With an id_map dict, adds take the book's own next order
+    IDs and later messages are translated through it, so the messages can share a book with other
+    order sources. A journal's quote and fill records count as applied but leave the book alone.
+    """
+    # Convert each column once per block so the loop below works on plain Python values
+    timestamps = messages['timestamp'].tolist()
+    events = messages['event'].tolist()
+    sides = messages['side'].tolist()
+    order_ids = messages['order_id'].tolist()
+    prices = messages['price'].tolist()
+    quantities = messages['quantity'].astype(np.int64).tolist()
+    applied = 0
+    for timestamp, event, side, order_id, price, quantity in zip(timestamps, events, sides, order_ids, prices, quantities):
+        if until is not None and timestamp > until:
+            break
+        if clock is not None:
+            clock.sleep_until(timestamp)
+        if event == ADD:
+            if id_map is None:
+                order_book.add_order(SIDE_NAMES[side], price, quantity, order_id=order_id)
+            else:
+                id_map[order_id] = order_book.add_order(SIDE_NAMES[side], price, quantity)
+        elif event == CANCEL or event == EXECUTE or event == MODIFY:
+            if id_map is not None:
+                order_id = id_map.get(order_id, -1)
+            if event == EXECUTE:
+                order_book.execute_order(order_id, quantity)  # Records the trade, so listeners and stops see it
+            elif event == MODIFY:
+                order_book.modify_order(order_id, price=price, quantity=quantity)  # Carries the new price and size
+            else:
+                order = order_book.get_order(order_id)
+                if order is not None:
+                    # Partial cancels shrink the order in place, keeping its queue position
+                    if 0 < quantity < order.quantity:
+                        order_book.modify_order(order_id, quantity=order.quantity - quantity)
+                    else:
+                        order_book.cancel_order(order_id)
+        applied += 1
+    return applied
+
+
+### Market Data Replay ###
+class MarketDataReplay:
+    """Streams a memory-mapped binary message file into an AdvancedOrderBook chunk by chunk.
+
+    Only the chunk being replayed is paged in, so session files larger than RAM can be used.
+    """
+    def __init__(self, path, chunk_size=65536):
+        self.messages = np.memmap(path, dtype=MESSAGE_DTYPE, mode='r')
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.messages)
+
+    def chunks(self, start=0):
+        """Yields consecutive slices of the message file."""
+        for offset in range(start, len(self.messages), self.chunk_size):
+            yield self.messages[offset:offset + self.chunk_size]
+
+    def replay_into(self, order_book, clock=None, until=None):
+        """Applies messages to the book in file order and returns how many were applied.
+
+        If a SimulatedClock is given it follows the message timestamps; replay stops before the
+        first message stamped after `until`.
+        """
+        applied = 0
+        for chunk in self.chunks():
+            count = apply_messages(order_book, chunk, clock, until)
+            applied += count
+            if count < len(chunk):
+                break
+        return applied
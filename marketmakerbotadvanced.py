@@ -1,13 +1,17 @@
 import numpy as np
-import heapq
 import random
-import time
-import matplotlib.pyplot as plt
-from orderbook import Order
+from marketmakermixin import MarketMakerMixin
+from simclock import RealTimeClock
+from orderstore import BUY, SELL
 
 ### Market-Maker Bot with Advanced Features ###
-class MarketMakerBotAdvanced:
-    def __init__(self, spread=0.02, inventory_limit=100, latency=0.1, slippage_factor=0.001):
+class MarketMakerBotAdvanced(MarketMakerMixin):
+    # (stage, method) pairs timed by enable_instrumentation; tick runs through these methods either way
+    TIMED_STAGES = (('update_order_book', 'refresh_book'), ('quote', 'current_quote'), ('tracker', 'track_performance'),
+                    ('matching', 'match_at_book'), ('booking', 'book_fills'))
+
+    def __init__(self, spread=0.02, inventory_limit=100, latency=0.1, slippage_factor=0.001, clock=None, rng=None, journal=None,
+                 instrument=False):
         self.spread = spread
         self.inventory_limit = inventory_limit
         self.latency = latency
@@ -16,14 +20,54 @@ class MarketMakerBotAdvanced:
         self.cash = 100000  # Starting with $100k
         self.order_book = None
         self.order_id = 0
+        self.clock = clock if clock is not None else RealTimeClock()  # Simulated clock for backtests, real time for paper trading
+        self.rng = rng if rng is not None else random  # Seeded random.Random for reproducible runs
+        self.journal = journal  # Optional EventJournal for quotes and fills
+        self.signals = None  # Optional SignalEngine, see subscribe_signals
+        self.latency_stats = None  # Per-stage StageLatencies when instrumented
+        self.top_watcher = None  # Set in event-driven mode, see enable_event_driven
+        self.bid = self.ask = None  # Current quotes in event-driven mode
+        if instrument:
+            self.enable_instrumentation()
 
     def set_order_book(self, order_book):
         """Sets the order book for the market-making bot."""
         self.order_book = order_book
 
+    def snapshot(self):
+        """Trading state as a dict of NumPy arrays; see booksnapshot."""
+        return {'cash': np.float64(self.cash), 'inventory': np.int64(self.inventory),
+                'order_id': np.int64(self.order_id), 'spread': np.float64(self.spread)}
+
+    def restore(self, state):
+        """Picks up the trading state from a snapshot()."""
+        self.cash = float(state['cash'])
+        self.inventory = int(state['inventory'])
+        self.order_id = int(state['order_id'])
+        self.spread = float(state['spread'])
+
+    def enable_event_driven(self):
+        """Requotes only when the book's best bid or ask changes, instead of on every tick."""
+        if self.top_watcher is None:
+            self.top_watcher = self.order_book.subscribe_top_of_book(self.on_top_of_book)
+
+    def disable_event_driven(self):
+        if self.top_watcher is not None:
+            self.order_book.remove_listener(self.top_watcher)
+            self.top_watcher = None
+
+    def on_top_of_book(self, best_bid, bid_size, best_ask, ask_size):
+        """Top-of-book callback: recomputes the quotes the next ticks will trade at."""
+        self.bid, self.ask = self.quote_prices(best_bid, best_ask)
+        if self.journal is not None:
+            self.journal.record_quote(self.clock.time(), self.bid, self.ask)
+
     def quote(self):
         """Generate dynamic bid and ask quotes based on market conditions."""
-        best_bid, best_ask = self.order_book.get_top_of_book()
+        return self.quote_prices(*self.order_book.get_top_of_book())
+
+    def quote_prices(self, best_bid, best_ask):
+        """Bid and ask quotes around a given best bid and ask."""
         if best_bid and best_ask:
             bid = best_bid * (1 - self.spread / 2)
             ask = best_ask * (1 + self.spread / 2)
@@ -38,40 +82,92 @@ class MarketMakerBotAdvanced:
 
     def handle_order(self, side, price, quantity):
         """Handles orders with latency, slippage, and market impact."""
-        time.sleep(self.latency)  # Simulate latency
-
-        if side == 'buy':
-            trades = self.order_book.match_sell_order(Order(self.order_id, side, price, quantity, 'market'))
-            for trade_price, trade_qty in trades:
-                executed_price = self.apply_slippage(trade_price, trade_qty)
-                self.inventory += trade_qty
-                self.cash -= executed_price * trade_qty
-                print(f"Executed BUY for {trade_qty} @ {executed_price:.2f}")
-        elif side == 'sell':
-            trades = self.order_book.match_buy_order(Order(self.order_id, side, price, quantity, 'market'))
-            for trade_price, trade_qty in trades:
-                executed_price = self.apply_slippage(trade_price, trade_qty)
-                self.inventory -= trade_qty
-                self.cash += executed_price * trade_qty
-                print(f"Executed SELL for {trade_qty} @ {executed_price:.2f}")
-        
+        self.clock.sleep(self.latency)  # Simulate latency
+        self.execute_order(side, price, quantity)
+
+    def submit_order(self, scheduler, side, price, quantity):
+        """Schedules an order to reach the book once the latency has elapsed, without blocking."""
+        scheduler.schedule(self.latency, self.execute_order, side, price, quantity)
+
+    def execute_order(self, side, price, quantity):
+        """Matches an order that has reached the book and applies slippage to its fills."""
+        trade_prices, trade_qtys = self.match_at_book(side, price, quantity)
+        self.book_fills(side, self.order_id, trade_prices, trade_qtys)
         self.order_id += 1  # Increment order ID for the next order
 
-    def market_make(self, duration=60, interval=0.1, performance_tracker=None):
-        """Main market-making loop with advanced features."""
-        for _ in range(int(duration / interval)):
-            self.order_book.update_order_book()
-            bid, ask = self.quote()
-            print(f"Bot Quoting: Bid {bid:.2f}, Ask {ask:.2f}")
+    def match_at_book(self, side, price, quantity):
+        """Matches an order and returns its fill prices and quantities (views, valid until the book's next batch match)."""
+        # A bot buy is matched against the bid side (and a sell against the asks), as match_sell_order/match_buy_order always did
+        taker_code = SELL if side == 'buy' else BUY
+        _, _, trade_prices, trade_qtys = self.order_book.match_orders_batch([taker_code], [price], [quantity])
+        return trade_prices, trade_qtys
 
-            # Simulate random market orders
-            if random.random() < 0.5:
-                self.handle_order('buy', ask, random.randint(5, 20))
-            if random.random() < 0.5:
-                self.handle_order('sell', bid, random.randint(5, 20))
+    def book_fills(self, side, order_id, trade_prices, trade_qtys):
+        """Applies slippage to fills and books them into cash and inventory."""
+        if not len(trade_qtys):
+            return
+        side_code = BUY if side == 'buy' else SELL
+        executed_prices = self.apply_slippage(trade_prices, trade_qtys)
+        traded = int(trade_qtys.sum())
+        notional = float(np.dot(executed_prices, trade_qtys))
+        if side_code == BUY:
+            self.inventory += traded
+            self.cash -= notional
+        else:
+            self.inventory -= traded
+            self.cash += notional
+        if self.journal is not None:
+            for executed_price, trade_qty in zip(executed_prices.tolist(), trade_qtys.tolist()):
+                self.journal.record_fill(self.clock.time(), side_code, order_id, executed_price, trade_qty)
 
-            # Track performance after each interval
-            if performance_tracker:
-                performance_tracker.track(self)
+    def tick(self, performance_tracker=None, scheduler=None):
+        """Runs one quoting step. With a scheduler, orders are delivered after the latency as events."""
+        self.refresh_book()
+        bid, ask = self.current_quote()
+
+        # Simulate random market orders
+        if self.rng.random() < 0.5:
+            self._send_order(scheduler, 'buy', ask, self.rng.randint(5, 20))
+        if self.rng.random() < 0.5:
+            self._send_order(scheduler, 'sell', bid, self.rng.randint(5, 20))
+
+        # Track performance after each interval
+        if performance_tracker:
+            self.track_performance(performance_tracker)
+
+    def refresh_book(self):
+        self.order_book.update_order_book()
+
+    def current_quote(self):
+        """The bid and ask to trade at this tick."""
+        if self.top_watcher is not None:
+            return self.bid, self.ask  # Kept current by on_top_of_book
+        bid, ask = self.quote()
+        if self.journal is not None:
+            self.journal.record_quote(self.clock.time(), bid, ask)
+        return bid, ask
+
+    def track_performance(self, performance_tracker):
+        performance_tracker.track(self)
+
+    def _send_order(self, scheduler, side, price, quantity):
+        if scheduler is None:
+            self.handle_order(side, price, quantity)
+        else:
+            self.submit_order(scheduler, side, price, quantity)
+
+    def market_make(self, duration=60, interval=0.1, performance_tracker=None, event_driven=False):
+        """Main market-making loop with advanced features. event_driven requotes on book changes only."""
+        if event_driven:
+            self.enable_event_driven()
+        for _ in range(int(duration / interval)):
+            self.tick(performance_tracker)
+            self.clock.sleep(interval)
+        if event_driven:
+            self.disable_event_driven()
 
-            time.sleep(interval)
\ No newline at end of file
+    def schedule_market_make(self, scheduler, duration=60, interval=0.1, performance_tracker=None):
+        """Schedules the market-making loop as tick events; call scheduler.run() to play it out."""
+        start = scheduler.clock.time()
+        for i in range(int(duration / interval)):
+            scheduler.schedule_at(start + i * interval, self.tick, performance_tracker, scheduler)
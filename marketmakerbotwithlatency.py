@@ -1,8 +1,11 @@
-import time
 import random
+import numpy as np
+from simclock import RealTimeClock
+from orderstore import BUY, SELL
+from marketmakermixin import MarketMakerMixin
 
-class MarketMakerBotWithLatency:
-    def __init__(self, spread=0.02, inventory_limit=100, latency=0.1, slippage_factor=0.001):
+class MarketMakerBotWithLatency(MarketMakerMixin):
+    def __init__(self, spread=0.02, inventory_limit=100, latency=0.1, slippage_factor=0.001, clock=None, rng=None, journal=None):
         self.spread = spread
         self.inventory_limit = inventory_limit
         self.latency = latency
@@ -10,11 +13,25 @@ class MarketMakerBotWithLatency:
         self.inventory = 0
         self.cash = 100000
         self.order_book = None
+        self.clock = clock if clock is not None else RealTimeClock()
+        self.rng = rng if rng is not None else random
+        self.journal = journal  # Optional EventJournal for quotes and fills
+        self.signals = None  # Optional SignalEngine, see subscribe_signals
 
     def set_order_book(self, order_book):
         """Sets the order book for the market-making bot."""
         self.order_book = order_book
 
+    def snapshot(self):
+        """Trading state as a dict of NumPy arrays; see booksnapshot."""
+        return {'cash': np.float64(self.cash), 'inventory': np.int64(self.inventory), 'spread': np.float64(self.spread)}
+
+    def restore(self, state):
+        """Picks up the trading state from a snapshot()."""
+        self.cash = float(state['cash'])
+        self.inventory = int(state['inventory'])
+        self.spread = float(state['spread'])
+
     def quote(self, price):
         """Generate dynamic bid and ask quotes, adjusted for market volatility."""
         bid = price * (1 - self.spread / 2)
@@ -28,21 +45,27 @@ class MarketMakerBotWithLatency:
 
     def handle_order(self, side, price, quantity):
         """Simulate handling an order with latency and slippage."""
-        time.sleep(self.latency)  # Simulate network latency
+        self.clock.sleep(self.latency)  # Simulate network latency
+        executed_quantity, executed_price = self.match_at_book(side, price, quantity)
+        if executed_price:
+            self.book_fill(side, executed_price, executed_quantity)
+
+    def match_at_book(self, side, price, quantity):
+        """Matches an order and returns (executed quantity, executed price)."""
+        # A buy takes liquidity from the book's sell side and vice versa
+        return self.order_book.match_order('sell' if side == 'buy' else 'buy', price, quantity)
+
+    def book_fill(self, side, executed_price, executed_quantity):
+        """Applies slippage to a fill and books it into cash and inventory."""
+        adjusted_price = self.apply_slippage(executed_price, executed_quantity)
         if side == 'buy':
-            executed_quantity, executed_price = self.order_book.match_order('sell', price, quantity)
-            if executed_price:
-                adjusted_price = self.apply_slippage(executed_price, executed_quantity)
-                self.inventory += executed_quantity
-                self.cash -= adjusted_price * executed_quantity
-                print(f"Executed BUY order for {executed_quantity} @ {adjusted_price:.2f}")
-        elif side == 'sell':
-            executed_quantity, executed_price = self.order_book.match_order('buy', price, quantity)
-            if executed_price:
-                adjusted_price = self.apply_slippage(executed_price, executed_quantity)
-                self.inventory -= executed_quantity
-                self.cash += adjusted_price * executed_quantity
-                print(f"Executed SELL order for {executed_quantity} @ {adjusted_price:.2f}")
+            self.inventory += executed_quantity
+            self.cash -= adjusted_price * executed_quantity
+        else:
+            self.inventory -= executed_quantity
+            self.cash += adjusted_price * executed_quantity
+        if self.journal is not None:
+            self.journal.record_fill(self.clock.time(), BUY if side == 'buy' else SELL, -1, adjusted_price, executed_quantity)
 
     def market_make(self, duration=60, interval=0.1):
         """Main loop for market-making, dynamically adjusts spread based on market volatility."""
@@ -50,10 +73,11 @@ class MarketMakerBotWithLatency:
             self.order_book.update_order_book()
             price = self.order_book.price
             bid, ask = self.quote(price)
-            print(f"Bid: {bid:.2f}, Ask: {ask:.2f}")
+            if self.journal is not None:
+                self.journal.record_quote(self.clock.time(), bid, ask)
 
             # Simulate buy/sell orders and match them
-            self.handle_order('sell', ask, random.randint(5, 20))  # Random sell at ask
-            self.handle_order('buy', bid, random.randint(5, 20))  # Random buy at bid
+            self.handle_order('sell', ask, self.rng.randint(5, 20))  # Random sell at ask
+            self.handle_order('buy', bid, self.rng.randint(5, 20))  # Random buy at bid
 
-            time.sleep(interval)
+            self.clock.sleep(interval)
@@ -1,67 +1,164 @@
-import random
 import numpy as np
 from marketmakerbotwithlatency import MarketMakerBotWithLatency
-import time
+from qtable import QTable, StateDiscretizer, ReplayBuffer
+from signalengine import SignalEngine
 
 class MarketMakerWithQLearning(MarketMakerBotWithLatency):
-    def __init__(self, spread=0.02, inventory_limit=100, latency=0.1, slippage_factor=0.001):
-        super().__init__(spread, inventory_limit, latency, slippage_factor)
-        self.q_table = {}
+    # (stage, method) pairs timed by enable_instrumentation; tick runs through these methods either way
+    TIMED_STAGES = (('update_order_book', 'refresh_book'), ('learning', 'observe'), ('quote', 'act'), ('settle', 'settle'),
+                    ('tracker', 'track_performance'), ('matching', 'match_at_book'), ('booking', 'book_fill'))
+
+    def __init__(self, spread=0.02, inventory_limit=100, latency=0.1, slippage_factor=0.001, clock=None, rng=None, journal=None,
+                 discretizer=None, replay_capacity=10000, replay_batch_size=32, instrument=False):
+        super().__init__(spread, inventory_limit, latency, slippage_factor, clock, rng, journal)
+        self.actions = (-0.001, 0.001)  # Spread adjustments
         self.learning_rate = 0.1
         self.discount_factor = 0.95
+        if discretizer is None:
+            # Price and volatility bins; the signal engine's EWMA volatility is per tick, about
+            # sigma * sqrt(dt) = 3e-4 on the default synthetic book
+            discretizer = StateDiscretizer.from_ranges([(90, 110), (0, 0.001)], [20, 10])
+        self.q_table = QTable(discretizer, self.actions, self.learning_rate, self.discount_factor)
+        self.replay_buffer = ReplayBuffer(replay_capacity)
+        self.replay_batch_size = replay_batch_size
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))  # For replay sampling, seeded from rng
         self.exploration_rate = 1.0  # Initial exploration rate
         self.exploration_decay = 0.995
         self.min_exploration_rate = 0.01
+        self.signals = SignalEngine()  # Fed with the book price each tick unless subscribed to an attached engine
+        self.pending = None  # (state, action, reward) waiting for the next tick's state
+        self.latency_stats = None  # Per-stage StageLatencies when instrumented
+        if instrument:
+            self.enable_instrumentation()
 
     def get_state(self, price, volatility):
-        """Returns a simplified state based on price and volatility."""
-        return (round(price, 2), round(volatility, 2))
+        """Returns the discretized state index for a price and volatility."""
+        return self.q_table.discretizer.index(price, volatility)
 
     def choose_action(self, state):
         """Choose an action (spread adjustment) based on the Q-table."""
-        if random.random() < self.exploration_rate:
-            return random.choice([-0.001, 0.001])  # Random spread adjustment
-        if state not in self.q_table:
-            self.q_table[state] = [0, 0]  # Initialize state in Q-table
-        return np.argmax(self.q_table[state]) - 0.001  # Choose best action
+        if self.rng.random() < self.exploration_rate:
+            return self.rng.choice(self.actions)  # Random spread adjustment
+        return self.actions[self.q_table.best_action(state)]  # Choose best action
 
     def update_q_table(self, state, action, reward, next_state):
-        """Updates Q-table based on the action taken and the reward received."""
-        if state not in self.q_table:
-            self.q_table[state] = [0, 0]
-        if next_state not in self.q_table:
-            self.q_table[next_state] = [0, 0]
-        action_idx = 0 if action == -0.001 else 1
-        q_value = self.q_table[state][action_idx]
-        next_max_q_value = max(self.q_table[next_state])
-        new_q_value = q_value + self.learning_rate * (reward + self.discount_factor * next_max_q_value - q_value)
-        self.q_table[state][action_idx] = new_q_value
-
-    def market_make(self, duration=60, interval=0.1):
-        """Main loop for market-making with Q-learning-based spread adjustments."""
+        """Updates Q-table based on the action taken and the reward received, and stores the transition for replay."""
+        action_idx = self.actions.index(action)
+        self.q_table.update(state, action_idx, reward, next_state)
+        self.replay_buffer.add(state, action_idx, reward, next_state)
+
+    def learn_from_replay(self, batch_size=None):
+        """Runs one batched off-policy update on transitions sampled from the replay buffer."""
+        batch_size = self.replay_batch_size if batch_size is None else batch_size
+        if len(self.replay_buffer) >= batch_size:
+            self.q_table.update_batch(*self.replay_buffer.sample(batch_size, self.np_rng))
+
+    def train_offline(self, iterations, batch_size=None):
+        """Trains on stored experience without stepping the market, e.g. between episodes."""
+        for _ in range(iterations):
+            self.learn_from_replay(batch_size)
+
+    def snapshot(self):
+        """Trading state plus the Q-table, exploration rate, replay buffer, signals and pending transition."""
+        state = super().snapshot()
+        buffer = self.replay_buffer
+        state['q'] = self.q_table.q.copy()
+        state['exploration_rate'] = np.float64(self.exploration_rate)
+        state['replay_states'] = buffer.states.copy()
+        state['replay_actions'] = buffer.actions.copy()
+        state['replay_rewards'] = buffer.rewards.copy()
+        state['replay_next_states'] = buffer.next_states.copy()
+        state['replay_counters'] = np.array([buffer.index, buffer.size], dtype=np.int64)
+        state['signals'] = self.signals.snapshot()
+        state['pending'] = np.array(self.pending if self.pending is not None else (), dtype=np.float64)  # (state, action, reward)
+        return state
+
+    def restore(self, state):
+        """Picks up the trading and learning state from a snapshot(); the bot's discretizer, actions and replay capacity must match."""
+        super().restore(state)
+        buffer = self.replay_buffer
+        self.q_table.q[:] = state['q']
+        self.exploration_rate = float(state['exploration_rate'])
+        buffer.states[:] = state['replay_states']
+        buffer.actions[:] = state['replay_actions']
+        buffer.rewards[:] = state['replay_rewards']
+        buffer.next_states[:] = state['replay_next_states']
+        buffer.index, buffer.size = state['replay_counters'].tolist()
+        self.signals.restore(state['signals'])
+        pending = state['pending'].tolist()
+        self.pending = (int(pending[0]), pending[1], pending[2]) if pending else None
+
+    def save_q_table(self, path):
+        self.q_table.save(path)
+
+    def load_q_table(self, path):
+        """Warm-starts the agent from a saved table."""
+        self.q_table = QTable.load(path)
+        self.actions = self.q_table.actions
+        self.learning_rate = self.q_table.learning_rate
+        self.discount_factor = self.q_table.discount_factor
+
+    def observe(self, price):
+        """Updates the signals for a new price, learns from the previous tick, and returns the current state."""
+        if not self.signals.attached:
+            self.signals.on_price(price)
+        state = self.get_state(price, self.signals.volatility)
+        if self.pending is not None:
+            self.update_q_table(*self.pending, state)
+            self.learn_from_replay()
+        return state
+
+    def act(self, state, price):
+        """Picks a spread adjustment for the state and returns the action and the resulting bid and ask."""
+        action = self.choose_action(state)
+
+        # Adjust spread based on action
+        self.spread += action
+        self.spread = max(0.001, self.spread)  # Ensure spread doesn't go negative
+        bid, ask = self.quote(price)
+        if self.journal is not None:
+            self.journal.record_quote(self.clock.time(), bid, ask)
+        return action, bid, ask
+
+    def settle(self, state, action, price):
+        """Computes the tick's reward, leaving the transition pending until the next state is known."""
+        # Reward: profit from market-making
+        reward = (self.cash + self.inventory * price) - 100000
+        self.pending = (state, action, reward)
+
+        # Decay exploration rate
+        self.exploration_rate = max(self.min_exploration_rate, self.exploration_rate * self.exploration_decay)
+
+    def tick(self, performance_tracker=None):
+        """Runs one quoting and learning step."""
+        self.refresh_book()
+        price = self.order_book.price
+        state = self.observe(price)
+        action, bid, ask = self.act(state, price)
+
+        # Simulate buy/sell orders and match them
+        self.handle_order('sell', ask, self.rng.randint(5, 20))
+        self.handle_order('buy', bid, self.rng.randint(5, 20))
+
+        self.settle(state, action, price)
+        if performance_tracker:
+            self.track_performance(performance_tracker, price)
+
+    def refresh_book(self):
+        self.order_book.update_order_book()
+
+    def track_performance(self, performance_tracker, price):
+        performance_tracker.track(self, price)
+
+    def reset_episode(self):
+        """Drops the pending transition, so the next tick starts a new episode instead of continuing this one."""
+        self.pending = None
+
+    def market_make(self, duration=60, interval=0.1, performance_tracker=None):
+        """Main loop for market-making with Q-learning-based spread adjustments.
+
+        Consecutive calls, and calls after restore(), continue the same episode; see reset_episode.
+        """
         for _ in range(int(duration / interval)):
-            self.order_book.update_order_book()
-            price = self.order_book.price
-            volatility = np.std([bid[0] for bid in self.order_book.bids])
-            state = self.get_state(price, volatility)
-            action = self.choose_action(state)
-
-            # Adjust spread based on action
-            self.spread += action
-            self.spread = max(0.001, self.spread)  # Ensure spread doesn't go negative
-            bid, ask = self.quote(price)
-            print(f"Bid: {bid:.2f}, Ask: {ask:.2f}")
-
-            # Simulate buy/sell orders and match them
-            self.handle_order('sell', ask, random.randint(5, 20))
-            self.handle_order('buy', bid, random.randint(5, 20))
-
-            # Reward: profit from market-making
-            reward = (self.cash + self.inventory * price) - 100000
-            next_state = self.get_state(price, volatility)
-            self.update_q_table(state, action, reward, next_state)
-
-            # Decay exploration rate
-            self.exploration_rate = max(self.min_exploration_rate, self.exploration_rate * self.exploration_decay)
-
-            time.sleep(interval)
+            self.tick(performance_tracker)
+            self.clock.sleep(interval)
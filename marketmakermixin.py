@@ -0,0 +1,23 @@
+from latencyhistogram import StageLatencies
+
+### Market-Maker Mixin ###
+class MarketMakerMixin:
+    """Signal subscription and per-stage instrumentation shared by the market-maker bots."""
+    # (stage, method) pairs timed by enable_instrumentation; each bot lists the methods its tick runs through
+    TIMED_STAGES = ()
+
+    def subscribe_signals(self, signal_engine):
+        """Reads volatility, imbalance and other signals from a shared SignalEngine instead of recomputing them."""
+        self.signals = signal_engine
+        if not signal_engine.attached and hasattr(self.order_book, 'add_listener'):
+            signal_engine.attach(self.order_book)
+
+    def enable_instrumentation(self):
+        """Times each of the class's TIMED_STAGES on every tick into self.latency_stats.
+
+        The timed methods are bound on the instance, so bots created without instrumentation
+        run the plain methods and pay nothing for it.
+        """
+        self.latency_stats = StageLatencies()
+        for stage, method in self.TIMED_STAGES:
+            setattr(self, method, self.latency_stats.timed(stage, getattr(self, method)))
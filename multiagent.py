@@ -0,0 +1,261 @@
+import numpy as np
+from orderstore import BUY, SELL, SIDE_NAMES
+
+# Agent kinds
+MARKET_MAKER, NOISE_TAKER, MOMENTUM = 0, 1, 2
+AGENT_KIND_NAMES = ('market_maker', 'noise_taker', 'momentum')
+
+# Messages in flight between the agents and the book
+TAKE, QUOTE = 0, 1
+BATCH_QUOTES = 16  # Runs of requotes at least this long go to the book in batches; shorter ones are cheaper one by one
+MESSAGE_DTYPE = np.dtype([('arrival', np.float64), ('agent', np.int64), ('type', np.int8), ('side', np.int8),
+                          ('price', np.float64), ('quantity', np.int64)])
+
+### Multi-Agent Market ###
+class MultiAgentMarket:
+    """Thousands of heterogeneous agents trading against one AdvancedOrderBook.
+
+    Agent state (cash, inventory, fills, parameters) lives in arrays indexed by agent ID. Each tick
+    every agent decides at once with vectorized draws, and its orders reach the book after the
+    agent's own latency. Market makers rest a bid and an ask, replacing them in batches when a requote changes them;
+    noise takers and momentum traders send immediate-or-cancel orders, matched in batches. Fills
+    are attributed to the taking agent by batch position and to the resting agent by order ID.
+    """
+    def __init__(self, order_book, seed=None, initial_cash=100000.0, tick_size=0.01):
+        self.order_book = order_book
+        self.clock = order_book.clock
+        self.np_rng = np.random.default_rng(seed)
+        self.initial_cash = initial_cash
+        self.tick_size = tick_size
+        self.kind = np.empty(0, dtype=np.int8)
+        self.latency = np.empty(0)
+        self.activity = np.empty(0)  # Chance of acting on each tick
+        self.size = np.empty(0, dtype=np.int64)
+        self.spread = np.empty(0)  # Market makers: quoted spread, relative to the mid
+        self.inventory_limit = np.empty(0, dtype=np.int64)  # Market makers stop quoting the side that would exceed it
+        self.aggression = np.empty(0)  # Takers: how far through the mid their limit price goes, relative
+        self.lookback = np.empty(0, dtype=np.int64)  # Momentum: ticks over which the return is measured
+        self.threshold = np.empty(0)  # Momentum: return needed to trade
+        self.cash = np.empty(0)
+        self.inventory = np.empty(0, dtype=np.int64)
+        self.fill_counts = np.empty(0, dtype=np.int64)
+        self.volume = np.empty(0, dtype=np.int64)
+        self.quote_ids = np.empty((0, 2), dtype=np.int64)  # Market makers' resting [bid, ask] order IDs, -1 if none
+        self.owner = np.full(1024, -1, dtype=np.int64)  # Book order ID to agent, -1 for orders that aren't an agent's
+        self.pending = np.empty(0, dtype=MESSAGE_DTYPE)  # Orders still travelling to the book
+        self.mid = 100.0
+        self.mid_history = np.full(1, self.mid)  # Ring of recent mids for the momentum signal
+        self.ticks = 0
+
+    def __len__(self):
+        return len(self.kind)
+
+    def _draw(self, value, count, dtype=np.float64):
+        """A scalar for every agent, or a uniform draw per agent from a (low, high) range."""
+        if isinstance(value, tuple):
+            low, high = value
+            if np.issubdtype(dtype, np.integer):
+                return self.np_rng.integers(low, high + 1, count)
+            return self.np_rng.uniform(low, high, count)
+        return np.full(count, value, dtype=dtype)
+
+    def add_agents(self, kind, count, latency=0.1, activity=0.5, size=10, spread=0.02, inventory_limit=100,
+                   aggression=0.01, lookback=10, threshold=0.001):
+        """Adds `count` agents of one kind; any parameter can be a (low, high) range drawn per agent. Returns their IDs."""
+        first = len(self)
+        columns = {
+            'kind': np.full(count, kind, dtype=np.int8),
+            'latency': self._draw(latency, count),
+            'activity': self._draw(activity, count),
+            'size': self._draw(size, count, np.int64),
+            'spread': self._draw(spread, count),
+            'inventory_limit': self._draw(inventory_limit, count, np.int64),
+            'aggression': self._draw(aggression, count),
+            'lookback': self._draw(lookback, count, np.int64),
+            'threshold': self._draw(threshold, count),
+            'cash': np.full(count, self.initial_cash),
+            'inventory': np.zeros(count, dtype=np.int64),
+            'fill_counts': np.zeros(count, dtype=np.int64),
+            'volume': np.zeros(count, dtype=np.int64),
+            'quote_ids': np.full((count, 2), -1, dtype=np.int64),
+        }
+        for name, values in columns.items():
+            setattr(self, name, np.concatenate((getattr(self, name), values.astype(getattr(self, name).dtype))))
+        history = int(self.lookback.max()) + 1
+        if history > len(self.mid_history):
+            self.mid_history = np.full(history, self.mid)
+        return np.arange(first, len(self))
+
+    def _decide(self, now):
+        """Every agent's orders for this tick, as messages timed to arrive after its latency."""
+        rng = self.np_rng
+        count = len(self)
+        active = rng.random(count) < self.activity
+        best_bid, best_ask = self.order_book.get_top_of_book()
+        messages = []
+
+        # Market makers requote both sides around the mid, without crossing the book or breaching their limits
+        makers = np.flatnonzero(active & (self.kind == MARKET_MAKER))
+        if len(makers):
+            bids = np.round(self.mid * (1 - self.spread[makers] / 2), 2)
+            asks = np.round(self.mid * (1 + self.spread[makers] / 2), 2)
+            if best_ask is not None:
+                bids = np.minimum(bids, round(best_ask - self.tick_size, 2))
+            if best_bid is not None:
+                asks = np.maximum(asks, round(best_bid + self.tick_size, 2))
+            inventory, limit, size = self.inventory[makers], self.inventory_limit[makers], self.size[makers]
+            messages.append(self._messages(now, makers, QUOTE, BUY, bids, np.where(inventory < limit, size, 0)))
+            messages.append(self._messages(now, makers, QUOTE, SELL, asks, np.where(inventory > -limit, size, 0)))
+
+        # Noise takers pick a random side and size
+        noise = np.flatnonzero(active & (self.kind == NOISE_TAKER))
+        if len(noise):
+            sides = rng.integers(0, 2, len(noise))
+            quantities = rng.integers(1, 2 * self.size[noise] + 1)
+            messages.append(self._take_messages(now, noise, sides, quantities))
+
+        # Momentum traders follow the mid's return over their lookback
+        momentum = np.flatnonzero(active & (self.kind == MOMENTUM))
+        if len(momentum):
+            past = self.mid_history[(self.ticks - self.lookback[momentum]) % len(self.mid_history)]
+            returns = self.mid / past - 1
+            trading = np.abs(returns) > self.threshold[momentum]
+            momentum = momentum[trading]
+            sides = np.where(returns[trading] > 0, BUY, SELL)
+            messages.append(self._take_messages(now, momentum, sides, self.size[momentum]))
+        return messages
+
+    def _take_messages(self, now, agents, sides, quantities):
+        # Marketable limit orders that go `aggression` through the mid
+        prices = self.mid * (1 + np.where(sides == BUY, 1, -1) * self.aggression[agents])
+        return self._messages(now, agents, TAKE, sides, prices, quantities)
+
+    def _messages(self, now, agents, message_type, sides, prices, quantities):
+        messages = np.empty(len(agents), dtype=MESSAGE_DTYPE)
+        messages['arrival'] = now + self.latency[agents]
+        messages['agent'] = agents
+        messages['type'] = message_type
+        messages['side'] = sides
+        messages['price'] = prices
+        messages['quantity'] = quantities
+        return messages
+
+    def _deliver(self, now):
+        """Hands the book every message that has arrived, in arrival order."""
+        arrived = self.pending['arrival'] <= now
+        if not arrived.any():
+            return
+        messages = self.pending[arrived]
+        self.pending = self.pending[~arrived]
+        messages = messages[np.argsort(messages['arrival'], kind='stable')]
+        # Consecutive takes go to the book as one batch; quotes are rested one by one
+        for run in np.split(messages, np.flatnonzero(np.diff(messages['type'])) + 1):
+            if run['type'][0] == TAKE:
+                self._take(run)
+            else:
+                self._quote(run)
+
+    def _take(self, run):
+        takers, maker_ids, prices, quantities = self.order_book.match_orders_batch(run['side'], run['price'], run['quantity'])
+        if not len(takers):
+            return
+        taker_agents = run['agent'][takers]
+        signs = np.where(run['side'][takers] == BUY, 1, -1)
+        self._book_fills(taker_agents, signs, prices, quantities)
+        known = maker_ids < len(self.owner)
+        maker_agents = np.where(known, self.owner[np.where(known, maker_ids, 0)], -1)
+        resting = maker_agents >= 0
+        self._book_fills(maker_agents[resting], -signs[resting], prices[resting], quantities[resting])
+
+    def _book_fills(self, agents, signs, prices, quantities):
+        """Books fills into the agents' cash and inventory, batched with np.add.at."""
+        np.add.at(self.cash, agents, -signs * prices * quantities)
+        np.add.at(self.inventory, agents, signs * quantities)
+        np.add.at(self.fill_counts, agents, 1)
+        np.add.at(self.volume, agents, quantities)
+
+    def _quote(self, run):
+        """Requotes market makers, touching the book only for quotes that changed.
+
+        Only each maker's latest quote per side in the run counts. A quote matching the price and
+        size of the maker's resting order leaves it alone, keeping its queue position; the rest
+        are cancelled and rested in one batched call each.
+        """
+        if len(run) < BATCH_QUOTES:
+            self._quote_each(run)
+            return
+        agents, sides, prices, quantities = run['agent'], run['side'], run['price'], run['quantity']
+        keys = agents * 2 + sides
+        if len(set(keys.tolist())) < len(keys):
+            # A maker requoted twice within the run: keep its last quote per side
+            _, last = np.unique(keys[::-1], return_index=True)
+            keep = np.sort(len(keys) - 1 - last)
+            agents, sides, prices, quantities = agents[keep], sides[keep], prices[keep], quantities[keep]
+        resting_ids = self.quote_ids[agents, sides]
+        resting_prices, resting_quantities = self.order_book.get_orders(resting_ids.tolist())  # NaN and 0 once filled or cancelled
+        changed = (resting_prices != prices) | (resting_quantities != quantities)
+        stale = changed & (resting_ids >= 0)
+        self.order_book.cancel_orders(resting_ids[stale].tolist())
+        self.quote_ids[agents[stale], sides[stale]] = -1
+        adding = changed & (quantities > 0)
+        if not adding.any():
+            return
+        agents, sides = agents[adding], sides[adding]
+        order_ids = self.order_book.add_orders(sides, prices[adding], quantities[adding])
+        if order_ids[-1] >= len(self.owner):
+            self.owner = np.concatenate((self.owner, np.full(max(len(self.owner), int(order_ids[-1]) + 1), -1, dtype=np.int64)))
+        self.owner[order_ids] = agents
+        self.quote_ids[agents, sides] = order_ids
+
+    def _quote_each(self, run):
+        """_quote for short runs, one message at a time in arrival order."""
+        order_book = self.order_book
+        for agent, side, price, quantity in zip(run['agent'].tolist(), run['side'].tolist(), run['price'].tolist(), run['quantity'].tolist()):
+            resting = int(self.quote_ids[agent, side])
+            if resting >= 0:
+                order = order_book.get_order(resting)
+                if order is not None and order.price == price and order.quantity == quantity:
+                    continue  # Unchanged, keep the queue position
+                order_book.cancel_order(resting)
+                self.quote_ids[agent, side] = -1
+            if quantity > 0:
+                order_id = order_book.add_order(SIDE_NAMES[side], price, quantity)
+                if order_id >= len(self.owner):
+                    self.owner = np.concatenate((self.owner, np.full(max(len(self.owner), order_id + 1), -1, dtype=np.int64)))
+                self.owner[order_id] = agent
+                self.quote_ids[agent, side] = order_id
+
+    def step(self):
+        """One tick: background flow, agent decisions, then delivery of every order that has arrived."""
+        self.order_book.update_order_book()
+        best_bid, best_ask = self.order_book.get_top_of_book()
+        if best_bid is not None and best_ask is not None:
+            self.mid = (best_bid + best_ask) / 2
+        self.mid_history[self.ticks % len(self.mid_history)] = self.mid
+        now = self.clock.time()
+        messages = self._decide(now)
+        if messages:
+            self.pending = np.concatenate([self.pending] + messages)
+        self._deliver(now)
+        self.ticks += 1
+
+    def run(self, duration=60, interval=0.1):
+        """Steps the market in clock time; orders still in flight at the end are delivered if they arrive by then."""
+        for _ in range(int(duration / interval)):
+            self.step()
+            self.clock.sleep(interval)
+        self._deliver(self.clock.time())
+
+    def pnl(self, mark_price=None):
+        """Per-agent profit, with inventory marked at the mid by default."""
+        mark_price = self.mid if mark_price is None else mark_price
+        return self.cash + self.inventory * mark_price - self.initial_cash
+
+    def summary(self):
+        """Totals per agent kind."""
+        pnl = self.pnl()
+        return {name: {'agents': int((self.kind == kind).sum()),
+                       'pnl': float(pnl[self.kind == kind].sum()),
+                       'volume': int(self.volume[self.kind == kind].sum()),
+                       'fills': int(self.fill_counts[self.kind == kind].sum())}
+                for kind, name in enumerate(AGENT_KIND_NAMES)}
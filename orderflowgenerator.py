@@ -0,0 +1,155 @@
+import numpy as np
+from eventjournal import ADD, CANCEL
+from marketdatareplay import MESSAGE_DTYPE, apply_messages
+from orderstore import BUY
+
+### Order Flow Generator ###
+class OrderFlowGenerator:
+    """Synthetic L3 order flow, generated a block of NumPy records at a time.
+
+    Arrivals are Poisson, or self-exciting Hawkes with intensity mu + sum(alpha * exp(-beta * (t - t_i)))
+    when hawkes_alpha > 0; `rate` is the long-run messages per second either way. Adds are priced a
+    geometric number of ticks from a mid that follows a random walk, and cancels hit recently added
+    orders. Blocks use the market data message layout, so they can be streamed into a book, written
+    to disk for MarketDataReplay, or journaled. With start=None the flow begins at the first time
+    it is streamed to, so it lines up with whatever clock the book runs on.
+    """
+    def __init__(self, rate=1000.0, hawkes_alpha=0.0, hawkes_beta=1.0, mid=100.0, tick_size=0.01, mid_volatility=0.0,
+                 price_decay=0.3, quantity_range=(1, 100), cancel_ratio=0.3, cancel_window=1000, block_size=65536,
+                 start=None, first_order_id=0, seed=None):
+        if hawkes_alpha >= hawkes_beta:
+            raise ValueError("hawkes_alpha must be below hawkes_beta, or the process explodes")
+        self.rate = rate
+        self.hawkes_alpha = hawkes_alpha  # Intensity jump per arrival
+        self.hawkes_beta = hawkes_beta  # Decay rate of the excitement, per second
+        self.branching_ratio = hawkes_alpha / hawkes_beta  # Expected arrivals triggered by each arrival
+        self.baseline = rate * (1 - self.branching_ratio)  # mu, so the stationary rate is `rate`
+        self.mid = mid
+        self.tick_size = tick_size
+        self.mid_volatility = mid_volatility  # Standard deviation of the mid per sqrt(second)
+        self.price_decay = price_decay  # Geometric parameter for the distance from the mid, in ticks
+        self.quantity_range = quantity_range
+        self.cancel_ratio = cancel_ratio
+        self.cancel_window = cancel_window  # Cancels pick uniformly among this many most recent adds
+        self.window = block_size / rate  # Seconds of flow per block, so blocks average block_size messages
+        self.np_rng = np.random.default_rng(seed)
+        self.time = start  # End of the flow generated so far; None until the start is known
+        self.last_time = start  # Timestamp of the last generated message
+        self.next_order_id = first_order_id
+        self.first_order_id = first_order_id
+        self.carry = np.empty(0)  # Hawkes arrivals already generated for later blocks
+        self.block = np.empty(0, dtype=MESSAGE_DTYPE)  # Block being streamed
+        self.position = 0  # Next unapplied message in self.block
+        self.id_map = {}  # Generated order ID to the book's order ID, for streamed adds that can still be cancelled
+
+    def _poisson_times(self, start, end):
+        count = self.np_rng.poisson(self.rate * (end - start))
+        return np.sort(self.np_rng.uniform(start, end, count))
+
+    def _hawkes_times(self, start, end):
+        """Arrivals in [start, end) from the branching representation: Poisson immigrants, each with Poisson children."""
+        rng = self.np_rng
+        generation = rng.uniform(start, end, rng.poisson(self.baseline * (end - start)))
+        times = [self.carry, generation]
+        while len(generation):
+            children = rng.poisson(self.branching_ratio, len(generation))
+            generation = np.repeat(generation, children) + rng.exponential(1 / self.hawkes_beta, children.sum())
+            times.append(generation)
+        times = np.sort(np.concatenate(times))
+        split = np.searchsorted(times, end)
+        self.carry = times[split:]  # Descendants landing after this block, complete with their own children
+        return times[:split]
+
+    def next_block(self):
+        """Generates the next window of flow as a MESSAGE_DTYPE array."""
+        if self.time is None:
+            self.time = self.last_time = 0.0  # Not streamed into a book, so time starts at 0
+        start, end = self.time, self.time + self.window
+        times = self._hawkes_times(start, end) if self.hawkes_alpha > 0 else self._poisson_times(start, end)
+        self.time = end
+        rng = self.np_rng
+        count = len(times)
+        block = np.empty(count, dtype=MESSAGE_DTYPE)
+        if not count:
+            return block
+        block['timestamp'] = times
+
+        # Mid follows a Gaussian random walk scaled by the time between arrivals
+        if self.mid_volatility:
+            steps = rng.standard_normal(count) * self.mid_volatility * np.sqrt(np.diff(times, prepend=self.last_time))
+            mids = self.mid + np.cumsum(steps)
+            self.mid = float(mids[-1])
+        else:
+            mids = np.full(count, self.mid)
+        self.last_time = float(times[-1])
+
+        sides = rng.integers(0, 2, count)
+        distance = rng.geometric(self.price_decay, count)  # At least one tick away, so adds don't cross the mid
+        ticks = np.round(mids / self.tick_size) + np.where(sides == BUY, -distance, distance)
+        is_cancel = rng.random(count) < self.cancel_ratio
+        is_add = ~is_cancel
+
+        # Adds take consecutive IDs; a cancel targets one of the cancel_window adds before it
+        adds_before = self.next_order_id + np.cumsum(is_add) - is_add
+        lookback = np.minimum(self.cancel_window, adds_before - self.first_order_id)
+        targets = adds_before - 1 - np.floor(rng.random(count) * lookback).astype(np.int64)
+        block['event'] = np.where(is_cancel, CANCEL, ADD)
+        block['side'] = sides
+        block['order_id'] = np.where(is_cancel, np.where(lookback > 0, targets, -1), adds_before)
+        block['price'] = np.where(is_cancel, 0.0, np.round(ticks * self.tick_size, 8))
+        block['quantity'] = np.where(is_cancel, 0, rng.integers(self.quantity_range[0], self.quantity_range[1] + 1, count))  # 0 cancels in full
+        self.next_order_id += int(is_add.sum())
+        return block
+
+    def blocks(self):
+        """Endless stream of blocks."""
+        while True:
+            yield self.next_block()
+
+    def snapshot(self):
+        """Generation and streaming state as a dict of NumPy arrays; the np_rng state is saved by booksnapshot."""
+        started = self.time is not None  # NaN times mark a flow that hasn't been streamed yet
+        return {'time': np.float64(self.time if started else np.nan),
+                'last_time': np.float64(self.last_time if started else np.nan), 'mid': np.float64(self.mid),
+                'next_order_id': np.int64(self.next_order_id), 'carry': self.carry.copy(), 'block': self.block.copy(),
+                'position': np.int64(self.position),
+                'map_order_id': np.fromiter(self.id_map.keys(), dtype=np.int64, count=len(self.id_map)),
+                'map_book_id': np.fromiter(self.id_map.values(), dtype=np.int64, count=len(self.id_map))}
+
+    def restore(self, state):
+        """Resumes the flow from a snapshot(), so a restored book doesn't stream it again from the start."""
+        self.time = None if np.isnan(state['time']) else float(state['time'])
+        self.last_time = None if np.isnan(state['last_time']) else float(state['last_time'])
+        self.mid = float(state['mid'])
+        self.next_order_id = int(state['next_order_id'])
+        self.carry = state['carry'].copy()
+        self.block = state['block'].copy()
+        self.position = int(state['position'])
+        self.id_map = dict(zip(state['map_order_id'].tolist(), state['map_book_id'].tolist()))
+
+    def stream_into(self, order_book, until, clock=None):
+        """Applies every not-yet-applied message stamped at or before `until` to the book; returns how many.
+
+        Blocks are generated lazily as the stream reaches them. Adds take the book's own order IDs,
+        so the flow can share the book with bots. If a SimulatedClock is given it follows the
+        message timestamps.
+        """
+        if self.time is None:
+            self.time = self.last_time = until  # First stream: start the flow at the book's current time
+        applied = 0
+        while True:
+            if self.position == len(self.block):
+                if self.time >= until:
+                    break
+                # Orders older than the cancel window can't be targeted again
+                oldest = self.next_order_id - self.cancel_window
+                self.id_map = {order_id: book_id for order_id, book_id in self.id_map.items() if order_id >= oldest}
+                self.block = self.next_block()
+                self.position = 0
+                continue
+            end = self.position + int(np.searchsorted(self.block['timestamp'][self.position:], until, 'right'))
+            applied += apply_messages(order_book, self.block[self.position:end], clock, id_map=self.id_map)
+            self.position = end
+            if end < len(self.block):
+                break
+        return applied
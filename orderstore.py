@@ -0,0 +1,158 @@
+import numpy as np
+
+# Integer codes used in place of the string sides and order types
+BUY, SELL = 0, 1
+SIDE_CODES = {'buy': BUY, 'sell': SELL}
+SIDE_NAMES = ('buy', 'sell')
+LIMIT, MARKET, STOP = 0, 1, 2
+ORDER_TYPE_CODES = {'limit': LIMIT, 'market': MARKET, 'stop': STOP}
+ORDER_TYPE_NAMES = ('limit', 'market', 'stop')
+NIL = -1  # Empty link / end of list
+
+### Order Store ###
+class OrderStore:
+    """Struct-of-arrays storage for resting orders.
+
+    Each order is a slot index into parallel NumPy columns instead of a Python object. Orders at
+    the same price are chained through the prev/next columns into a FIFO queue, and released slots
+    are recycled through a free list threaded through the same next column.
+    """
+    def __init__(self, capacity=1024):
+        self.capacity = 0
+        self.size = 0  # Slots ever handed out; slots below this are live or on the free list
+        self.count = 0  # Live orders
+        self.free_head = NIL
+        self.sequence_counter = 0  # Monotonic sequence number for time priority
+        self.order_id = np.empty(0, dtype=np.int64)
+        self.side = np.empty(0, dtype=np.int8)
+        self.order_type = np.empty(0, dtype=np.int8)
+        self.price = np.empty(0, dtype=np.float64)
+        self.quantity = np.empty(0, dtype=np.int64)
+        self.sequence = np.empty(0, dtype=np.int64)
+        self.timestamp = np.empty(0, dtype=np.float64)
+        self.prev = np.empty(0, dtype=np.int64)
+        self.next = np.empty(0, dtype=np.int64)
+        self._grow(capacity)
+
+    COLUMNS = ('order_id', 'side', 'order_type', 'price', 'quantity', 'sequence', 'timestamp', 'prev', 'next')
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self, capacity):
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def allocate(self, order_id, side, price, quantity, order_type=LIMIT, timestamp=0.0):
+        """Stores an order (integer side and type codes) and returns its slot."""
+        if self.free_head != NIL:
+            slot = self.free_head
+            self.free_head = int(self.next[slot])
+        else:
+            if self.size == self.capacity:
+                self._grow(max(2 * self.capacity, 1))
+            slot = self.size
+            self.size += 1
+        self.order_id[slot] = order_id
+        self.side[slot] = side
+        self.order_type[slot] = order_type
+        self.price[slot] = price
+        self.quantity[slot] = quantity
+        self.sequence[slot] = self.sequence_counter
+        self.timestamp[slot] = timestamp
+        self.prev[slot] = NIL
+        self.next[slot] = NIL
+        self.sequence_counter += 1
+        self.count += 1
+        return slot
+
+    def release(self, slot):
+        """Returns a slot to the free list. Any OrderView on it becomes stale."""
+        self.quantity[slot] = 0
+        self.next[slot] = self.free_head
+        self.free_head = slot
+        self.count -= 1
+
+    def allocate_batch(self, order_ids, sides, prices, quantities, order_type=LIMIT, timestamp=0.0):
+        """Stores many orders at once, in sequence order, and returns their slots. Links are left unset."""
+        count = len(order_ids)
+        slots = np.empty(count, dtype=np.int64)
+        reused = 0
+        while reused < count and self.free_head != NIL:
+            slots[reused] = self.free_head
+            self.free_head = int(self.next[self.free_head])
+            reused += 1
+        fresh = count - reused
+        if self.size + fresh > self.capacity:
+            self._grow(max(2 * self.capacity, self.size + fresh))
+        slots[reused:] = np.arange(self.size, self.size + fresh)
+        self.size += fresh
+        self.order_id[slots] = order_ids
+        self.side[slots] = sides
+        self.order_type[slots] = order_type
+        self.price[slots] = prices
+        self.quantity[slots] = quantities
+        self.sequence[slots] = np.arange(self.sequence_counter, self.sequence_counter + count)
+        self.timestamp[slots] = timestamp
+        self.sequence_counter += count
+        self.count += count
+        return slots
+
+    def release_batch(self, slots):
+        """Returns many slots to the free list at once."""
+        if not len(slots):
+            return
+        self.quantity[slots] = 0
+        self.next[slots[:-1]] = slots[1:]
+        self.next[slots[-1]] = self.free_head
+        self.free_head = int(slots[0])
+        self.count -= len(slots)
+
+    def view(self, slot):
+        return OrderView(self, slot)
+
+    def nbytes(self):
+        """Memory held by the columns."""
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+
+### Order View ###
+class OrderView:
+    """Lightweight read-only handle onto one slot of an OrderStore."""
+    __slots__ = ('store', 'slot')
+
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    @property
+    def order_id(self):
+        return int(self.store.order_id[self.slot])
+
+    @property
+    def side(self):
+        return SIDE_NAMES[self.store.side[self.slot]]
+
+    @property
+    def order_type(self):
+        return ORDER_TYPE_NAMES[self.store.order_type[self.slot]]
+
+    @property
+    def price(self):
+        return float(self.store.price[self.slot])
+
+    @property
+    def quantity(self):
+        return int(self.store.quantity[self.slot])
+
+    @property
+    def sequence(self):
+        return int(self.store.sequence[self.slot])
+
+    @property
+    def timestamp(self):
+        return float(self.store.timestamp[self.slot])
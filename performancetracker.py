@@ -1,45 +1,177 @@
-import matplotlib.pyplot as plt
+import math
+import numpy as np
+
+# Record layout used when the ring buffers spill to disk
+SPILL_DTYPE = np.dtype([('profit', np.float64), ('inventory', np.float64), ('cash', np.float64)])
+
+def book_mark_price(order_book):
+    """The price inventory is marked at: the best bid, or the price of an L1 book. None if there are no bids."""
+    if hasattr(order_book, 'get_top_of_book'):
+        return order_book.get_top_of_book()[0]
+    return order_book.price
+
+
+def load_spill(path):
+    """Loads samples spilled by a PerformanceTracker as a structured array."""
+    return np.fromfile(path, dtype=SPILL_DTYPE)
+
 
 ### Performance Tracker ###
 class PerformanceTracker:
-    def __init__(self):
-        self.profits = []
-        self.inventory = []
-        self.cash = []
+    def __init__(self, capacity=100000, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = spill_path  # If set, full buffers are appended here instead of being overwritten
+        if spill_path is not None:
+            open(spill_path, 'wb').close()  # Start empty, so a previous run's samples aren't picked up
+        self._profits = np.empty(capacity)
+        self._inventory = np.empty(capacity)
+        self._cash = np.empty(capacity)
+        self.index = 0  # Next slot to write
+        self.wrapped = False  # True once old samples have been overwritten
+        self.samples = 0  # Samples tracked over the whole run
+
+        # Incrementally updated risk metrics
+        self.peak = -math.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.last_profit = None
+        self.last_inventory = 0
+        self.returns_mean = 0.0
+        self.returns_m2 = 0.0  # Welford sum of squared deviations of per-tick PnL changes
+        self.return_count = 0
+        self.inventory_mean = 0.0
+        self.inventory_m2 = 0.0
+        self.turnover = 0.0  # Total absolute change in inventory
 
-    def track(self, bot):
+    def track(self, bot, mark_price=None):
         """Tracks the total profit, cash, and inventory over time."""
-        best_bid = bot.order_book.get_top_of_book()[0]  # Get the best bid
-        inventory_value = best_bid * bot.inventory if best_bid is not None else 0  # If best bid is None, inventory value is 0
+        if mark_price is None:
+            mark_price = book_mark_price(bot.order_book)
+        inventory_value = mark_price * bot.inventory if mark_price is not None else 0  # If best bid is None, inventory value is 0
         total_assets = bot.cash + inventory_value  # Cash + inventory value
-        self.profits.append(total_assets)
-        self.inventory.append(bot.inventory)
-        self.cash.append(bot.cash)
-        
-    def plot(self):
-        """Plots the performance metrics over time."""
+
+        if self.index == self.capacity:
+            self._flush()
+        self._profits[self.index] = total_assets
+        self._inventory[self.index] = bot.inventory
+        self._cash[self.index] = bot.cash
+        self.index += 1
+        self._update_metrics(total_assets, bot.inventory)
+
+    def _flush(self):
+        """Spills the full buffers to disk, or starts overwriting the oldest samples."""
+        if self.spill_path is not None:
+            records = np.empty(self.capacity, dtype=SPILL_DTYPE)
+            records['profit'] = self._profits
+            records['inventory'] = self._inventory
+            records['cash'] = self._cash
+            with open(self.spill_path, 'ab') as f:
+                records.tofile(f)
+        else:
+            self.wrapped = True
+        self.index = 0
+
+    def _update_metrics(self, total_assets, inventory):
+        self.samples += 1
+
+        self.peak = max(self.peak, total_assets)
+        self.drawdown = self.peak - total_assets
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+        if self.last_profit is not None:
+            pnl_change = total_assets - self.last_profit
+            self.return_count += 1
+            delta = pnl_change - self.returns_mean
+            self.returns_mean += delta / self.return_count
+            self.returns_m2 += delta * (pnl_change - self.returns_mean)
+            self.turnover += abs(inventory - self.last_inventory)
+        self.last_profit = total_assets
+        self.last_inventory = inventory
+
+        delta = inventory - self.inventory_mean
+        self.inventory_mean += delta / self.samples
+        self.inventory_m2 += delta * (inventory - self.inventory_mean)
+
+    @property
+    def sharpe_ratio(self):
+        """Running per-tick Sharpe ratio of PnL changes."""
+        if self.return_count < 2 or self.returns_m2 == 0:
+            return 0.0
+        return self.returns_mean / math.sqrt(self.returns_m2 / (self.return_count - 1))
+
+    @property
+    def inventory_variance(self):
+        return self.inventory_m2 / (self.samples - 1) if self.samples > 1 else 0.0
+
+    def risk(self):
+        """Returns the current risk metrics in O(1), without touching the history."""
+        return {
+            'total_assets': self.last_profit,
+            'drawdown': self.drawdown,
+            'max_drawdown': self.max_drawdown,
+            'sharpe_ratio': self.sharpe_ratio,
+            'inventory_variance': self.inventory_variance,
+            'turnover': self.turnover,
+        }
+
+    def _series(self, buffer):
+        """Returns the buffered samples oldest first; a view unless the ring has wrapped."""
+        if not self.wrapped:
+            return buffer[:self.index]
+        return np.concatenate((buffer[self.index:], buffer[:self.index]))
+
+    @property
+    def profits(self):
+        return self._series(self._profits)
+
+    @property
+    def inventory(self):
+        return self._series(self._inventory)
+
+    @property
+    def cash(self):
+        return self._series(self._cash)
+
+    def plot(self, path=None, max_points=2000):
+        """Plots the performance metrics over time, downsampled to max_points per series.
+
+        With a path the chart is rendered straight to that file, headless; otherwise it's shown in a window.
+        """
+        if path is not None:
+            from reporting import plot_performance
+            plot_performance(self, path, max_points)
+            return
+        import matplotlib.pyplot as plt  # Imported here so tracking never pays for matplotlib
+        from reporting import downsample, tracker_series
+
+        series = tracker_series(self)
         plt.figure(figsize=(12, 8))
 
         plt.subplot(3, 1, 1)
-        plt.plot(self.profits, label='Total Profit')
+        plt.plot(*downsample(series['profit'], max_points), label='Total Profit')
         plt.title('Total Profit Over Time')
         plt.xlabel('Time')
         plt.ylabel('Profit')
         plt.grid(True)
 
         plt.subplot(3, 1, 2)
-        plt.plot(self.inventory, label='Inventory Level')
+        plt.plot(*downsample(series['inventory'], max_points), label='Inventory Level')
         plt.title('Inventory Over Time')
         plt.xlabel('Time')
         plt.ylabel('Inventory')
         plt.grid(True)
 
         plt.subplot(3, 1, 3)
-        plt.plot(self.cash, label='Cash Balance')
+        plt.plot(*downsample(series['cash'], max_points), label='Cash Balance')
         plt.title('Cash Balance Over Time')
         plt.xlabel('Time')
         plt.ylabel('Cash')
         plt.grid(True)
 
         plt.tight_layout()
-        plt.show()
\ No newline at end of file
+        plt.show()
+
+    def export(self, path):
+        """Writes the profit, inventory and cash series as .npy columns in a directory, or one .npz file."""
+        from reporting import export_tracker
+        export_tracker(self, path)
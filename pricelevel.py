@@ -0,0 +1,139 @@
+import math
+import numpy as np
+from bisect import bisect_left, insort
+from orderstore import NIL
+
+### Price Level ###
+class PriceLevel:
+    """All resting orders at one price, as a FIFO (time-priority) list of OrderStore slots."""
+    __slots__ = ('price', 'store', 'head', 'tail', 'count', 'quantity')
+
+    def __init__(self, price, store):
+        self.price = price
+        self.store = store
+        self.head = NIL  # Oldest order's slot
+        self.tail = NIL  # Newest order's slot
+        self.count = 0
+        self.quantity = 0  # Aggregate resting quantity at this price
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Iterates over slots from oldest to newest."""
+        slot = self.head
+        while slot != NIL:
+            yield slot
+            slot = int(self.store.next[slot])
+
+    def append(self, slot):
+        """Queues a slot at the back of the level."""
+        store = self.store
+        store.prev[slot] = self.tail
+        store.next[slot] = NIL
+        if self.tail == NIL:
+            self.head = slot
+        else:
+            store.next[self.tail] = slot
+        self.tail = slot
+        self.count += 1
+        self.quantity += int(store.quantity[slot])
+
+    def remove(self, slot):
+        """Unlinks a slot from anywhere in the queue in O(1)."""
+        store = self.store
+        prev_slot = int(store.prev[slot])
+        next_slot = int(store.next[slot])
+        if prev_slot == NIL:
+            self.head = next_slot
+        else:
+            store.next[prev_slot] = next_slot
+        if next_slot == NIL:
+            self.tail = prev_slot
+        else:
+            store.prev[next_slot] = prev_slot
+        self.count -= 1
+        self.quantity -= int(store.quantity[slot])
+
+
+### Book Side ###
+class BookSide:
+    """One side of the book, with price levels sorted so the best price is always last."""
+    def __init__(self, side, store):
+        self.side = side
+        self.store = store
+        self.levels = {}  # Price to PriceLevel
+        self.keys = []  # Sorted level keys, best price at the end
+        self.sign = 1 if side == 'buy' else -1  # Asks are keyed by -price so the lowest ask sorts last
+        self.depth_cache = None  # n to (prices, quantities), all views of the top depth_cache_n levels
+        self.depth_cache_n = 0  # Deepest n requested so far; shallower reads are served as slices
+        self.depth_cutoff = math.inf  # Key of the worst cached level; changes at or above it invalidate the cache
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __iter__(self):
+        """Iterates over price levels from best to worst."""
+        for key in reversed(self.keys):
+            yield self.levels[self.sign * key]
+
+    def best_level(self):
+        """Returns the best price level, or None if this side is empty."""
+        return self.levels[self.sign * self.keys[-1]] if self.keys else None
+
+    def best_price(self):
+        """Returns the best price, or None if this side is empty."""
+        return self.sign * self.keys[-1] if self.keys else None
+
+    def crosses(self, price):
+        """Checks whether an opposing order at this price would trade against the best level."""
+        return len(self.keys) > 0 and self.sign * price <= self.keys[-1]
+
+    def touch(self, price):
+        """Invalidates the depth cache if a change at this price can affect the cached levels."""
+        if self.sign * price >= self.depth_cutoff:
+            self.depth_cache = None
+            self.depth_cutoff = math.inf
+
+    def depth(self, n):
+        """Returns read-only (prices, quantities) arrays for the best n levels, best first.
+
+        One cache covers every reader: it holds the deepest n asked for, and shallower reads get
+        slices of it, so readers at different depths don't evict each other.
+        """
+        cache = self.depth_cache
+        if cache is not None and n <= self.depth_cache_n:
+            depth = cache.get(n)
+            if depth is None:
+                prices, quantities = cache[self.depth_cache_n]
+                depth = cache[n] = (prices[:n], quantities[:n])  # Same objects until invalidated, for identity checks
+            return depth
+        deepest = max(n, self.depth_cache_n)
+        top_keys = self.keys[:-deepest - 1:-1] if deepest > 0 else []
+        prices = np.array([self.sign * key for key in top_keys], dtype=np.float64)
+        quantities = np.array([self.levels[price].quantity for price in prices.tolist()], dtype=np.int64)
+        prices.setflags(write=False)
+        quantities.setflags(write=False)
+        self.depth_cache = {deepest: (prices, quantities)}
+        self.depth_cache_n = deepest
+        # With fewer than deepest levels any new level enters the cache, so every change invalidates
+        self.depth_cutoff = top_keys[-1] if len(top_keys) == deepest and deepest > 0 else -math.inf
+        return self.depth(n)
+
+    def get_level(self, price):
+        """Returns the level for a price, creating it in O(log levels) if needed."""
+        level = self.levels.get(price)
+        if level is None:
+            level = PriceLevel(price, self.store)
+            self.levels[price] = level
+            insort(self.keys, self.sign * price)
+        return level
+
+    def remove_level(self, level):
+        """Drops an empty price level; the best level is removed in O(1)."""
+        del self.levels[level.price]
+        key = self.sign * level.price
+        if self.keys[-1] == key:
+            self.keys.pop()
+        else:
+            del self.keys[bisect_left(self.keys, key)]
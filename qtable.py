@@ -0,0 +1,101 @@
+import numpy as np
+from bisect import bisect_right
+
+### State Discretizer ###
+class StateDiscretizer:
+    """Maps continuous state features to a flat integer state using fixed bin edges per feature."""
+    def __init__(self, bin_edges):
+        self.bin_edges = [np.asarray(edges, dtype=np.float64) for edges in bin_edges]
+        self._edge_lists = [edges.tolist() for edges in self.bin_edges]  # For fast scalar lookups
+        self.shape = tuple(len(edges) + 1 for edges in self.bin_edges)  # Values below/above the edges get their own bins
+        self.n_states = int(np.prod(self.shape))
+        self._strides = [int(np.prod(self.shape[i + 1:])) for i in range(len(self.shape))]
+
+    @classmethod
+    def from_ranges(cls, ranges, bins):
+        """Builds evenly spaced bins, e.g. from_ranges([(90, 110), (0, 5)], [20, 10])."""
+        return cls([np.linspace(low, high, n + 1)[1:-1] for (low, high), n in zip(ranges, bins)])
+
+    def index(self, *features):
+        """Returns the flat state index for one set of feature values."""
+        state = 0
+        for value, edges, stride in zip(features, self._edge_lists, self._strides):
+            state += bisect_right(edges, value) * stride
+        return state
+
+    def indices(self, features):
+        """Vectorized index for an (N, n_features) array of feature values."""
+        features = np.asarray(features, dtype=np.float64)
+        bins = [np.searchsorted(edges, features[:, i], side='right') for i, edges in enumerate(self.bin_edges)]
+        return np.ravel_multi_index(bins, self.shape)
+
+
+### Experience Replay ###
+class ReplayBuffer:
+    """Fixed-size ring buffer of (state, action, reward, next state) transitions."""
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.index = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state):
+        self.states[self.index] = state
+        self.actions[self.index] = action
+        self.rewards[self.index] = reward
+        self.next_states[self.index] = next_state
+        self.index = (self.index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size, rng):
+        """Draws a random batch of transitions with a NumPy Generator."""
+        picks = rng.integers(0, self.size, size=batch_size)
+        return self.states[picks], self.actions[picks], self.rewards[picks], self.next_states[picks]
+
+
+### Q-Table ###
+class QTable:
+    """Dense Q-value array over discretized states and a fixed list of actions."""
+    def __init__(self, discretizer, actions, learning_rate=0.1, discount_factor=0.95):
+        self.discretizer = discretizer
+        self.actions = tuple(actions)
+        self.learning_rate = learning_rate
+        self.discount_factor = discount_factor
+        self.q = np.zeros((discretizer.n_states, len(self.actions)))
+
+    def best_action(self, state):
+        """Returns the index of the highest-valued action in a state."""
+        return int(np.argmax(self.q[state]))
+
+    def update(self, state, action, reward, next_state):
+        """One-step Q-learning update for a single transition."""
+        target = reward + self.discount_factor * self.q[next_state].max()
+        self.q[state, action] += self.learning_rate * (target - self.q[state, action])
+
+    def update_batch(self, states, actions, rewards, next_states):
+        """Off-policy Q-learning update for a batch of transitions at once."""
+        targets = rewards + self.discount_factor * self.q[next_states].max(axis=1)
+        errors = targets - self.q[states, actions]
+        np.add.at(self.q, (states, actions), self.learning_rate * errors)
+
+    def save(self, path):
+        """Writes the Q-values, actions and bin edges to an uncompressed .npz file."""
+        edges = {f'edges_{i}': e for i, e in enumerate(self.discretizer.bin_edges)}
+        np.savez(path, q=self.q, actions=np.asarray(self.actions),
+                 hyperparameters=np.array([self.learning_rate, self.discount_factor]), **edges)
+
+    @classmethod
+    def load(cls, path):
+        """Restores a table written by save."""
+        with np.load(path) as data:
+            edges = [data[f'edges_{i}'] for i in range(sum(1 for key in data.files if key.startswith('edges_')))]
+            learning_rate, discount_factor = data['hyperparameters'].tolist()
+            table = cls(StateDiscretizer(edges), data['actions'].tolist(), learning_rate, discount_factor)
+            table.q[:] = data['q']
+        return table
@@ -0,0 +1,94 @@
+import os
+import numpy as np
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling; returns the indices of the points to keep.
+
+    Keeps the first and last points and, from each of threshold - 2 equal buckets in between, the
+    point forming the largest triangle with the previously kept point and the next bucket's mean.
+    Peaks and troughs survive, unlike with plain striding.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)  # Bucket boundaries, excluding both end points
+    # Each bucket's mean, used as the third triangle vertex for the bucket before it
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    mean_x = np.append(sums_x / counts, x[-1])
+    mean_y = np.append(sums_y / counts, y[-1])
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Twice the triangle area, for every candidate in the bucket at once
+        areas = np.abs((x[previous] - mean_x[i + 1]) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (mean_y[i + 1] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        keep[i + 1] = previous
+    return keep
+
+
+def downsample(y, max_points=2000, x=None):
+    """Returns (x, y) reduced to at most max_points with LTTB; x defaults to the sample index."""
+    y = np.asarray(y)
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    keep = lttb(x, y, max_points)
+    return x[keep], y[keep]
+
+
+def tracker_series(tracker):
+    """A PerformanceTracker's full series, including any samples it spilled to disk."""
+    columns = {'profit': tracker.profits, 'inventory': tracker.inventory, 'cash': tracker.cash}
+    if tracker.spill_path is not None and os.path.exists(tracker.spill_path):
+        from performancetracker import load_spill
+        spilled = load_spill(tracker.spill_path)
+        columns = {name: np.concatenate((spilled[name], values)) for name, values in columns.items()}
+    return columns
+
+
+def export_columns(path, columns):
+    """Writes named 1-D series as columns: one .npz file, or a directory of memory-mappable .npy files."""
+    if path.endswith('.npz'):
+        np.savez(path, **columns)
+        return
+    os.makedirs(path, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(path, f'{name}.npy'), np.asarray(values))
+
+
+def export_tracker(tracker, path):
+    """Exports a PerformanceTracker's profit, inventory and cash series; see export_columns."""
+    export_columns(path, tracker_series(tracker))
+
+
+def plot_series(path, panels, max_points=2000, figsize=(12, 8)):
+    """Renders stacked line charts straight to an image file, without a display.
+
+    panels is a list of (title, ylabel, values) tuples. Each series is downsampled with LTTB first,
+    so plotting cost doesn't grow with the run length. matplotlib is only imported here.
+    """
+    from matplotlib.figure import Figure  # A bare Figure renders with Agg, no pyplot or GUI backend needed
+
+    figure = Figure(figsize=figsize)
+    for i, (title, ylabel, values) in enumerate(panels):
+        axes = figure.add_subplot(len(panels), 1, i + 1)
+        axes.plot(*downsample(values, max_points))
+        axes.set_title(title)
+        axes.set_xlabel('Time')
+        axes.set_ylabel(ylabel)
+        axes.grid(True)
+    figure.tight_layout()
+    figure.savefig(path)
+
+
+def plot_performance(tracker, path, max_points=2000):
+    """Saves the PerformanceTracker's profit, inventory and cash charts to an image file."""
+    series = tracker_series(tracker)
+    plot_series(path, [('Total Profit Over Time', 'Profit', series['profit']),
+                       ('Inventory Over Time', 'Inventory', series['inventory']),
+                       ('Cash Balance Over Time', 'Cash', series['cash'])], max_points)
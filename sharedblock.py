@@ -0,0 +1,25 @@
+from multiprocessing import shared_memory
+
+### Shared Block ###
+class SharedBlock:
+    """Base for NumPy views onto a shared-memory block that one process creates and others attach to by name.
+
+    Only the creating process (the owner) unlinks the block. Subclasses list the attributes holding
+    their views in VIEWS, so close() can release them before closing the mapping.
+    """
+    VIEWS = ()
+
+    def _open(self, size, name=None):
+        """Creates a block of `size` bytes, or attaches to the named one."""
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    def close(self):
+        for view in self.VIEWS:
+            delattr(self, view)  # Release the views before closing the mapping
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,119 @@
+import math
+import numpy as np
+
+### Signal Engine ###
+class SignalEngine:
+    """Microstructure signals kept up to date with O(1) work per book or trade event.
+
+    Attach it to an AdvancedOrderBook to be fed automatically, or call on_quote/on_price/on_trade
+    directly for books that can't publish events. Bots read the current values instead of
+    recomputing them from the book.
+    """
+    # Running state saved by snapshot(), in array order
+    STATE_FIELDS = ('bid', 'ask', 'bid_size', 'ask_size', 'mid', 'ewma_variance', 'return_count', 'return_mean', 'return_m2',
+                    'ofi', 'ofi_ewma', 'intensity', 'last_trade_time', 'last_trade_price')
+
+    def __init__(self, alpha=0.06, ofi_alpha=0.1, intensity_timescale=1.0):
+        self.alpha = alpha  # EWMA weight for squared mid returns (0.06 is the RiskMetrics daily value)
+        self.ofi_alpha = ofi_alpha  # EWMA weight for order-flow imbalance
+        self.intensity_timescale = intensity_timescale  # Seconds over which trade intensity decays
+        self.attached = False
+
+        self.bid = self.ask = None
+        self.bid_size = self.ask_size = 0
+        self.mid = None
+        self.ewma_variance = 0.0
+        self.return_count = 0
+        self.return_mean = 0.0
+        self.return_m2 = 0.0  # Welford sum of squared deviations of mid log returns
+        self.ofi = 0.0  # Cumulative order-flow imbalance (Cont, Kukanov and Stoikov)
+        self.ofi_ewma = 0.0
+        self.intensity = 0.0  # Exponentially decayed trades per second
+        self.last_trade_time = None
+        self.last_trade_price = None
+
+    def attach(self, order_book):
+        """Subscribes to an AdvancedOrderBook's book and trade events."""
+        order_book.add_listener(self)
+        self.attached = True
+        self.on_book_update(order_book)
+
+    def snapshot(self):
+        """The running state as one float array, NaN for values not seen yet."""
+        return np.array([math.nan if getattr(self, name) is None else getattr(self, name) for name in self.STATE_FIELDS],
+                        dtype=np.float64)
+
+    def restore(self, values):
+        for name, value in zip(self.STATE_FIELDS, values.tolist()):
+            if name in ('bid_size', 'ask_size', 'return_count'):
+                value = int(value)
+            setattr(self, name, None if math.isnan(value) else value)
+
+    def on_book_update(self, order_book):
+        bid_prices, bid_sizes, ask_prices, ask_sizes = order_book.get_depth(1)  # Cached, and a slice of any deeper cached read
+        if len(bid_prices) and len(ask_prices):
+            self.on_quote(bid_prices[0], ask_prices[0], bid_sizes[0], ask_sizes[0])
+
+    def on_price(self, price):
+        """Feeds a bare price from an L1 book without sizes."""
+        self.on_quote(price, price, 0, 0)
+
+    def on_quote(self, bid, ask, bid_size, ask_size):
+        """Updates the signals for a new best bid/ask."""
+        bid, ask, bid_size, ask_size = float(bid), float(ask), int(bid_size), int(ask_size)
+        if self.bid is not None:
+            # Order-flow imbalance: growth on the bid minus growth on the ask
+            flow = 0.0
+            if bid >= self.bid:
+                flow += bid_size
+            if bid <= self.bid:
+                flow -= self.bid_size
+            if ask <= self.ask:
+                flow -= ask_size
+            if ask >= self.ask:
+                flow += self.ask_size
+            self.ofi += flow
+            self.ofi_ewma += self.ofi_alpha * (flow - self.ofi_ewma)
+
+        mid = (bid + ask) / 2
+        if self.mid is not None and mid != self.mid and mid > 0 and self.mid > 0:
+            log_return = math.log(mid / self.mid)
+            self.ewma_variance += self.alpha * (log_return * log_return - self.ewma_variance)
+            self.return_count += 1
+            delta = log_return - self.return_mean
+            self.return_mean += delta / self.return_count
+            self.return_m2 += delta * (log_return - self.return_mean)
+
+        self.bid, self.ask, self.bid_size, self.ask_size, self.mid = bid, ask, bid_size, ask_size, mid
+
+    def on_trade(self, price, quantity, side, timestamp):
+        """Updates trade intensity for one fill."""
+        if self.last_trade_time is not None:
+            self.intensity *= math.exp(-(timestamp - self.last_trade_time) / self.intensity_timescale)
+        self.intensity += 1 / self.intensity_timescale
+        self.last_trade_time = timestamp
+        self.last_trade_price = price
+
+    @property
+    def volatility(self):
+        """EWMA standard deviation of mid log returns, per mid move."""
+        return math.sqrt(self.ewma_variance)
+
+    @property
+    def welford_volatility(self):
+        """Sample standard deviation of every mid log return seen so far."""
+        return math.sqrt(self.return_m2 / (self.return_count - 1)) if self.return_count > 1 else 0.0
+
+    @property
+    def microprice(self):
+        """Size-weighted mid that leans towards the side with less resting quantity."""
+        total = self.bid_size + self.ask_size
+        if total == 0:
+            return self.mid
+        return (self.bid * self.ask_size + self.ask * self.bid_size) / total
+
+    def trade_intensity(self, timestamp):
+        """Trades per second, decayed to the given time."""
+        if self.last_trade_time is None:
+            return 0.0
+        return self.intensity * math.exp(-(timestamp - self.last_trade_time) / self.intensity_timescale)
@@ -0,0 +1,31 @@
+import time
+
+### Clocks ###
+class RealTimeClock:
+    """Wall-clock time; sleeping really blocks. Use for paper trading."""
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def sleep_until(self, timestamp):
+        self.sleep(timestamp - time.time())
+
+
+class SimulatedClock:
+    """Virtual time for backtests; sleeping just advances the clock, so runs go as fast as the CPU allows."""
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+    def sleep_until(self, timestamp):
+        if timestamp > self.now:
+            self.now = timestamp
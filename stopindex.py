@@ -0,0 +1,50 @@
+from bisect import bisect_left, insort
+
+### Stop Index ###
+class StopIndex:
+    """Pending stop and stop-limit orders for one side, sorted by trigger price.
+
+    Buy stops trigger when the price trades up to their stop, sell stops when it trades down to it.
+    Entries are keyed so the next stop to trigger is always last, the same trick BookSide uses for
+    the best price: finding the stops crossed by a trade is a bisect, and removing them is O(k).
+    """
+    def __init__(self, side):
+        self.side = side
+        self.sign = -1 if side == 'buy' else 1  # Buy stops are keyed by -stop_price so the lowest sorts last
+        self.entries = []  # Sorted (sign * stop_price, -sequence, order_id); earlier orders sort later at equal prices
+        self.stops = {}  # Order ID to (stop_price, limit_price, quantity, sequence)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, order_id):
+        return order_id in self.stops
+
+    def add(self, order_id, stop_price, quantity, limit_price, sequence):
+        """Queues a stop; limit_price None makes it a stop (market) order."""
+        self.stops[order_id] = (stop_price, limit_price, quantity, sequence)
+        insort(self.entries, (self.sign * stop_price, -sequence, order_id))
+
+    def remove(self, order_id):
+        """Drops a pending stop; returns False if it isn't in this index."""
+        stop = self.stops.pop(order_id, None)
+        if stop is None:
+            return False
+        stop_price, _, _, sequence = stop
+        del self.entries[bisect_left(self.entries, (self.sign * stop_price, -sequence, order_id))]
+        return True
+
+    def triggered(self, price):
+        """Removes and returns the stops a trade at `price` triggers, nearest stop first, then oldest first.
+
+        Each is (order_id, stop_price, limit_price, quantity).
+        """
+        index = bisect_left(self.entries, (self.sign * price,))
+        if index == len(self.entries):
+            return []
+        fired = []
+        for _, _, order_id in reversed(self.entries[index:]):
+            stop_price, limit_price, quantity, _ = self.stops.pop(order_id)
+            fired.append((order_id, stop_price, limit_price, quantity))
+        del self.entries[index:]
+        return fired
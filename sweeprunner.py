@@ -0,0 +1,74 @@
+import itertools
+import os
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from advancedorderbook import AdvancedOrderBook
+from marketmakerbotadvanced import MarketMakerBotAdvanced
+from marketmakerbotwithlatency import MarketMakerBotWithLatency
+from performancetracker import book_mark_price
+from syntheticorderbook import SyntheticOrderBook
+from simclock import SimulatedClock
+
+def expand_grid(param_grid):
+    """Expands {'spread': [...], 'latency': [...]} into one parameter dict per combination."""
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[name] for name in names))]
+
+
+def spawn_seeds(base_seed, count):
+    """Derives independent, reproducible per-run seeds from one base seed."""
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(base_seed).spawn(count)]
+
+
+def default_book_factory(bot_class):
+    """The book a bot class trades on: the L1 SyntheticOrderBook for the latency/Q-learning bots, else AdvancedOrderBook."""
+    return SyntheticOrderBook if issubclass(bot_class, MarketMakerBotWithLatency) else AdvancedOrderBook
+
+
+def run_simulation(bot_class, params, seed, duration=60, interval=0.1, book_factory=None):
+    """Runs one seeded simulation in virtual time and returns a compact result record."""
+    if book_factory is None:
+        book_factory = default_book_factory(bot_class)
+    rng = random.Random(seed)
+    clock = SimulatedClock()
+    order_book = book_factory(clock=clock, rng=rng)
+    bot = bot_class(clock=clock, rng=rng, **params)
+    bot.set_order_book(order_book)
+    bot.market_make(duration=duration, interval=interval)
+
+    mark_price = book_mark_price(order_book)  # The same mark PerformanceTracker uses
+    inventory_value = mark_price * bot.inventory if mark_price is not None else 0
+    return {
+        'bot': bot_class.__name__,
+        'params': params,
+        'seed': seed,
+        'cash': bot.cash,
+        'inventory': bot.inventory,
+        'pnl': bot.cash + inventory_value - 100000,
+    }
+
+
+def run_sweep(param_grid, bot_class=MarketMakerBotAdvanced, base_seed=0, duration=60, interval=0.1,
+              book_factory=None, max_workers=None):
+    """Fans a parameter grid out over a process pool and yields result records as runs finish.
+
+    Each run gets its own seed derived from base_seed and its position in the grid, so results
+    don't depend on which worker picks up which run. book_factory and bot_class must be picklable
+    and accept clock and rng keyword arguments; book_factory defaults to the book the bot class trades on.
+    """
+    if book_factory is None:
+        book_factory = default_book_factory(bot_class)
+    runs = expand_grid(param_grid)
+    seeds = spawn_seeds(base_seed, len(runs))
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [executor.submit(run_simulation, bot_class, params, seed, duration, interval, book_factory)
+                   for params, seed in zip(runs, seeds)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+if __name__ == '__main__':
+    grid = {'spread': [0.01, 0.02, 0.04], 'inventory_limit': [50, 100], 'slippage_factor': [0.0005, 0.001]}
+    for record in run_sweep(grid, base_seed=42):
+        print(f"{record['params']} seed={record['seed']} PnL {record['pnl']:.2f} inventory {record['inventory']}")
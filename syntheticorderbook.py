@@ -0,0 +1,95 @@
+import math
+import random
+import numpy as np
+from simclock import RealTimeClock
+
+### Synthetic L1 Order Book ###
+class SyntheticOrderBook:
+    """Top-of-book market model for MarketMakerBotWithLatency and MarketMakerWithQLearning.
+
+    The mid follows a geometric Brownian motion, optionally with Merton jumps, simulated `block_size`
+    steps at a time; each update_order_book call moves it one step of `dt` seconds. A passive order
+    `distance` away from the mid fills within a step with probability 1 - exp(-A * exp(-k * distance) * dt)
+    (the Avellaneda-Stoikov intensity), and marketable orders fill at the mid.
+    """
+    def __init__(self, price=100.0, mu=0.0, sigma=0.001, dt=0.1, jump_intensity=0.0, jump_mean=0.0, jump_std=0.0,
+                 fill_intensity=10.0, fill_decay=1.5, tick_size=0.01, levels=5, level_quantity=100, block_size=65536,
+                 clock=None, rng=None):
+        self.price = price
+        self.mu = mu  # Drift of the log price, per second
+        self.sigma = sigma  # Volatility of the log price, per sqrt(second)
+        self.dt = dt  # Seconds per update_order_book step
+        self.jump_intensity = jump_intensity  # Jumps per second
+        self.jump_mean = jump_mean  # Mean and standard deviation of each jump in the log price
+        self.jump_std = jump_std
+        self.fill_intensity = fill_intensity  # A: fills per second at the mid
+        self.fill_decay = fill_decay  # k: decay of the fill intensity per unit of price away from the mid
+        self.tick_size = tick_size
+        self.levels = levels
+        self.level_quantity = level_quantity
+        self.block_size = block_size
+        self.clock = clock if clock is not None else RealTimeClock()  # Same interface as AdvancedOrderBook; the path steps per update
+        self.rng = rng if rng is not None else random
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))  # For the vectorized draws, seeded from rng
+        self.path = []  # Upcoming mids, as a list since they're read one at a time
+        self.path_index = 0
+        self.fill_draws = []  # Upcoming uniform draws for the fill model
+        self.fill_index = 0
+
+    def simulate_path(self, steps, start=None):
+        """Returns `steps` mids following `start` (the current price by default) as a NumPy array."""
+        start = self.price if start is None else start
+        rng = self.np_rng
+        log_returns = (self.mu - 0.5 * self.sigma ** 2) * self.dt + self.sigma * math.sqrt(self.dt) * rng.standard_normal(steps)
+        if self.jump_intensity:
+            jumps = rng.poisson(self.jump_intensity * self.dt, steps)
+            log_returns += jumps * self.jump_mean + np.sqrt(jumps) * self.jump_std * rng.standard_normal(steps)
+        return start * np.exp(np.cumsum(log_returns))
+
+    def update_order_book(self):
+        """Moves the mid one step along the pre-simulated path."""
+        if self.path_index == len(self.path):
+            self.path = self.simulate_path(self.block_size).tolist()
+            self.path_index = 0
+        self.price = self.path[self.path_index]
+        self.path_index += 1
+
+    def snapshot(self):
+        """Mid and pre-drawn randomness as a dict of NumPy arrays; see booksnapshot, which also saves np_rng."""
+        return {'price': np.float64(self.price), 'path': np.array(self.path[self.path_index:], dtype=np.float64),
+                'fill_draws': np.array(self.fill_draws[self.fill_index:], dtype=np.float64)}
+
+    def restore(self, state):
+        """Continues from a snapshot() along the same pre-simulated path and fill draws."""
+        self.price = float(state['price'])
+        self.path = state['path'].tolist()
+        self.path_index = 0
+        self.fill_draws = state['fill_draws'].tolist()
+        self.fill_index = 0
+
+    @property
+    def bids(self):
+        """Synthetic bid ladder below the mid as (price, quantity) pairs, best first."""
+        best = math.floor(self.price / self.tick_size)
+        return [(round((best - i) * self.tick_size, 8), self.level_quantity) for i in range(self.levels)]
+
+    @property
+    def asks(self):
+        """Synthetic ask ladder above the mid as (price, quantity) pairs, best first."""
+        best = math.ceil(self.price / self.tick_size)
+        return [(round((best + i) * self.tick_size, 8), self.level_quantity) for i in range(self.levels)]
+
+    def match_order(self, side, price, quantity):
+        """Matches an order against the `side` of the market; returns (executed quantity, price) or (0, None)."""
+        # Resting buyers take a sell at `price` and resting sellers take a buy
+        distance = price - self.price if side == 'buy' else self.price - price
+        if distance <= 0:
+            return quantity, self.price  # Marketable
+        if self.fill_index == len(self.fill_draws):
+            self.fill_draws = self.np_rng.random(self.block_size).tolist()
+            self.fill_index = 0
+        draw = self.fill_draws[self.fill_index]
+        self.fill_index += 1
+        if draw < 1 - math.exp(-self.fill_intensity * math.exp(-self.fill_decay * distance) * self.dt):
+            return quantity, price
+        return 0, None